@@ -1,74 +1,71 @@
+import time
+
+# Taken before any other import so the startup report includes import time
+STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import threading
-import time
-import pyperclip
-import win32gui
-import win32con
-import win32api
-import win32clipboard
-import keyboard
-import requests
-import json
-from googletrans import Translator
-import langdetect
-from langdetect import detect
-import sqlite3
 import os
-from datetime import datetime
 import sys
-import pygame
-from gtts import gTTS
-import tempfile
-import io
+# Heavy packages (googletrans, langdetect, pygame, gTTS, keyboard, pyperclip)
+# are imported where they are used or during the background warm-up
+from translator_core import (AdaptiveDebounce, AsyncTranslatorEngine, AudioController,
+                             DegradedTranslation, IncrementalTranslator, PygamePlayer, RequestSequencer, StartupTimer,
+                             TranslatorEngine, WorkerPool, create_clipboard_watcher)
 
 class UniversalTranslator:
-    def __init__(self):
-        self.root = tk.Tk()
-        self.setup_window()
-        
-        # Initialize translator with error handling
-        try:
-            from googletrans import Translator
-            self.translator = Translator()
-        except ImportError:
-            messagebox.showerror("Missing Package", 
-                               "Please install googletrans: pip install googletrans==4.0.0rc1")
-            sys.exit()
-        except Exception as e:
-            print(f"Translator initialization warning: {e}")
-            self.translator = None
-        
-        # Initialize pygame mixer for audio playback
-        try:
-            pygame.mixer.init()
-            self.audio_enabled = True
-        except:
-            self.audio_enabled = False
-            print("Audio playback not available")
-        
-        self.current_audio_file = None
+    def __init__(self, backend='googletrans', backend_options=None, synthesizer='gtts',
+                 startup_report=False, fallback_backend=None, hedge_after=None):
+        self.startup = StartupTimer(started=STARTED)
+        self.startup_report = startup_report
+        
+        with self.startup.phase('window'):
+            self.root = tk.Tk()
+            self.setup_window()
+        
+        # The engine opens history.db now, the backend and its imports load after the window shows
+        with self.startup.phase('engine'):
+            self.engine = TranslatorEngine(backend=backend, backend_options=backend_options,
+                                           synthesizer=synthesizer,
+                                           lazy_backend=True, fallback_backend=fallback_backend,
+                                           hedge_after=hedge_after)
+        self.db_path = self.engine.db_path
+        # Set during warm-up for backends that run on an event loop (http)
+        self.async_engine = None
+        
+        # Bounded worker pool shared by translation and audio tasks
+        self.workers = WorkerPool(max_workers=4, max_queue=32,
+                                  provider_limits={'translation': 2, 'tts': 1})
+        
+        # Per-field request IDs so only the newest result is shown and saved
+        self.sequencer = RequestSequencer()
+        self.pending_input = ""
+        self.history_window = None
+        self.last_saved_live = None
+        
+        # Live typing only re-translates changed sentences, after an adaptive pause
+        self.incremental = IncrementalTranslator(self.engine)
+        self.debounce = AdaptiveDebounce(initial=500)
+        
+        # Audio comes up during warm-up, until then speak() does nothing
+        self.audio_enabled = False
+        self.audio = None
+        self.speaking_button = None
         self.settings = {
             'auto_insert': True,
             'clipboard_monitor': True,
             'always_on_top': True,
             'target_language': 'es',
-            'auto_play_audio': False  # New setting for auto-play audio
+            'auto_play_audio': False,  # New setting for auto-play audio
+            'auto_memory': False  # Serve similar (not only identical) past translations
         }
         
         # Language mappings
-        self.languages = {
-            'en': 'English', 'es': 'Spanish', 'fr': 'French', 'de': 'German',
-            'it': 'Italian', 'pt': 'Portuguese', 'ru': 'Russian', 'ja': 'Japanese',
-            'ko': 'Korean', 'zh': 'Chinese (Simplified)', 'ar': 'Arabic', 'hi': 'Hindi',
-            'nl': 'Dutch', 'sv': 'Swedish', 'no': 'Norwegian', 'da': 'Danish',
-            'fi': 'Finnish', 'pl': 'Polish', 'cs': 'Czech', 'sk': 'Slovak',
-            'hu': 'Hungarian', 'ro': 'Romanian', 'bg': 'Bulgarian', 'hr': 'Croatian'
-        }
+        self.languages = self.engine.languages
         
-        self.create_widgets()
-        self.setup_hotkeys()
-        self.init_database()
+        with self.startup.phase('widgets'):
+            self.create_widgets()
         
         # Initialize these variables BEFORE starting clipboard monitor
         self.current_mode = "translate"
@@ -76,7 +73,62 @@ class UniversalTranslator:
         self.monitoring = False
         
         # Start clipboard monitor AFTER all variables are initialized
-        self.start_clipboard_monitor()
+        with self.startup.phase('clipboard monitor'):
+            self.start_clipboard_monitor()
+        
+        # Show the window now, everything else loads behind it
+        self.root.update()
+        self.startup.mark('window shown')
+        threading.Thread(target=self.warm_up, name='startup-warmup', daemon=True).start()
+        
+    def warm_up(self):
+        """Load the heavy subsystems in the background once the window is visible"""
+        with self.startup.phase('translation backend'):
+            try:
+                self.engine.load_backend()
+            except ImportError:
+                self.root.after(0, self.show_missing_backend)
+                return
+            if getattr(self.engine.translator, 'provider', None) is not None:
+                self.async_engine = AsyncTranslatorEngine(self.engine)
+        
+        with self.startup.phase('hotkeys'):
+            self.setup_hotkeys()
+        
+        # Language detection profiles
+        with self.startup.phase('language detector'):
+            self.engine.detector.warm_up(background=False)
+        
+        with self.startup.phase('audio'):
+            self.init_audio()
+        
+        # Near-identical past translations are answered from history without the network
+        with self.startup.phase('translation memory'):
+            self.engine.load_memory(background=False)
+        
+        # Retention and compaction of history.db run off the UI thread
+        self.engine.start_maintenance()
+        self.startup.mark('ready')
+        
+        if self.startup_report:
+            print(self.startup.report())
+    
+    def show_missing_backend(self):
+        """Tell the user which package the translation backend needs, then quit"""
+        messagebox.showerror("Missing Package", 
+                           "Please install googletrans: pip install googletrans==4.0.0rc1")
+        self.on_closing()
+    
+    def init_audio(self):
+        """Initialize the pygame mixer and the audio controller"""
+        try:
+            import pygame
+            pygame.mixer.init()
+            # One controller owns the mixer and plays queued speech back to back
+            self.audio = AudioController(PygamePlayer(self.engine.synthesizer.format))
+            self.audio_enabled = True
+        except Exception:
+            print("Audio playback not available")
         
     def setup_window(self):
         """Configure the main window"""
@@ -185,7 +237,7 @@ class UniversalTranslator:
         
         # Play audio button
         self.play_btn = tk.Button(output_header, text="🔊", 
-                                command=self.play_translation_audio,
+                                command=lambda: self.on_play_button(self.play_btn, self.play_translation_audio),
                                 bg='#e2e8f0', fg='#64748b', bd=0, padx=8, pady=2,
                                 font=('Segoe UI', 12), state='disabled')
         self.play_btn.pack(side='right')
@@ -197,6 +249,13 @@ class UniversalTranslator:
         self.output_text.insert(1.0, "Translation will appear here...")
         self.output_text.config(state='disabled')
         
+        # Similar past translation, offered but never used without a click
+        self.suggestion = None
+        self.suggestion_label = tk.Label(self.translation_frame, text="", bg='#fefce8', fg='#854d0e',
+                                         font=('Segoe UI', 9), anchor='w', justify='left',
+                                         wraplength=400, cursor='hand2')
+        self.suggestion_label.bind('<Button-1>', lambda e: self.use_suggestion())
+        
         # Action buttons
         btn_frame = tk.Frame(self.translation_frame, bg='#f0f2f5')
         btn_frame.pack(fill='x', pady=(0, 15))
@@ -219,6 +278,12 @@ class UniversalTranslator:
                                  font=('Segoe UI', 9))
         self.clear_btn.pack(side='left', padx=5)
         
+        self.history_btn = tk.Button(btn_frame, text="📜 History", 
+                                   command=self.open_history_browser,
+                                   bg='#e2e8f0', fg='#64748b', bd=0, padx=15, pady=8,
+                                   font=('Segoe UI', 9))
+        self.history_btn.pack(side='left', padx=5)
+        
         # Auto-detect section (initially hidden)
         self.autodetect_frame = tk.Frame(main_frame, bg='#f0f2f5')
         
@@ -301,6 +366,18 @@ class UniversalTranslator:
                                    bg='#f8fafc', command=self.update_settings)
         audio_check.pack(side='right')
         
+        # Translation memory setting
+        memory_frame = tk.Frame(settings_frame, bg='#f8fafc')
+        memory_frame.pack(fill='x', padx=10, pady=5)
+        
+        tk.Label(memory_frame, text="Use similar past translations automatically", bg='#f8fafc', 
+                font=('Segoe UI', 9)).pack(side='left')
+        
+        self.auto_memory_var = tk.BooleanVar(value=self.settings['auto_memory'])
+        memory_check = tk.Checkbutton(memory_frame, variable=self.auto_memory_var, 
+                                    bg='#f8fafc', command=self.toggle_auto_memory)
+        memory_check.pack(side='right')
+        
     def setup_hotkeys(self):
         """Setup global hotkeys"""
         try:
@@ -313,104 +390,65 @@ class UniversalTranslator:
         except Exception as e:
             print(f"Could not register hotkeys: {e}")
             
-    def init_database(self):
-        """Initialize SQLite database for translation history"""
-        if not os.path.exists('translator_data'):
-            os.makedirs('translator_data')
-            
-        self.db_path = os.path.join('translator_data', 'history.db')
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS translations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_text TEXT,
-                translated_text TEXT,
-                source_lang TEXT,
-                target_lang TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        
-    def save_translation(self, source, translated, source_lang, target_lang):
-        """Save translation to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO translations (source_text, translated_text, source_lang, target_lang)
-            VALUES (?, ?, ?, ?)
-        ''', (source, translated, source_lang, target_lang))
-        
-        conn.commit()
-        conn.close()
+    def save_translation(self, source, translated, source_lang, target_lang, supersedes=None):
+        """Save translation to database (written in the background)"""
+        self.engine.save_translation(source, translated, source_lang, target_lang, supersedes)
         
     def get_language_code(self, language_name):
         """Get language code from language name"""
-        for code, name in self.languages.items():
-            if name == language_name:
-                return code
-        return 'en'
+        return self.engine.get_language_code(language_name)
         
     def translate_text(self, text, source_lang, target_lang):
-        """Translate text using Google Translate"""
-        try:
-            if not text.strip():
-                return ""
-            
-            if self.translator is None:
-                return "Translation service not available"
-            
-            # Handle auto-detect for source language
-            if source_lang == 'auto':
-                source_lang = None
-                
-            # Use googletrans for translation
-            result = self.translator.translate(text, src=source_lang, dest=target_lang)
-            return result.text
-            
-        except Exception as e:
-            print(f"Translation error: {e}")
-            # Try with auto-detect if source language failed
-            if source_lang and source_lang != 'auto':
-                try:
-                    result = self.translator.translate(text, src=None, dest=target_lang)
-                    return result.text
-                except:
-                    pass
-            return f"Translation error: {str(e)}"
-            
+        """Translate text using the selected translation backend"""
+        return self.engine.translate_text(text, source_lang, target_lang)
+        
+    def translate_batch(self, texts, source_lang, target_lang):
+        """Translate many texts in batched provider requests"""
+        return self.engine.translate_batch(texts, source_lang, target_lang)
+        
+    def get_cache_stats(self):
+        """Get translation cache hit/miss counters"""
+        return self.engine.get_cache_stats()
+    
+    def get_audio_cache_stats(self):
+        """Get audio cache hit/miss counters and size"""
+        return self.engine.get_audio_cache_stats()
+        
     def detect_language(self, text):
         """Detect language of text"""
-        try:
-            from langdetect import detect
-            detected_lang = detect(text)
-            return detected_lang
-        except ImportError:
-            print("langdetect package not found")
-            return 'en'
-        except:
-            return 'en'
+        return self.engine.detect_language(text)
             
     def on_text_change(self, event=None):
         """Handle text input changes"""
         if self.current_mode == 'translate':
+            # Ignore key releases that did not change the text (arrows, modifiers)
+            input_text = self.input_text.get(1.0, tk.END).strip()
+            if input_text == self.pending_input:
+                return
+            self.pending_input = input_text
+            self.debounce.record_keystroke()
+            
+            # Results for the old text are stale, drop them as soon as it changes
+            self.sequencer.invalidate('translate')
+            self.workers.cancel('translate')
+            # Audio synthesized ahead for the old translation is no longer wanted
+            self.sequencer.invalidate('speech_prefetch')
+            self.workers.cancel('speech_prefetch')
+            
             # Debounce translation to avoid too many API calls
             if hasattr(self, 'translate_timer'):
                 self.root.after_cancel(self.translate_timer)
-            self.translate_timer = self.root.after(500, self.perform_translation)
+            self.translate_timer = self.root.after(self.debounce.interval(), self.perform_translation)
             
     def perform_translation(self):
         """Perform the actual translation"""
         input_text = self.input_text.get(1.0, tk.END).strip()
+        self.pending_input = input_text
+        request_id = self.sequencer.next('translate')
         
-        input_text = self.input_text.get(1.0, tk.END).strip()
-        
+        self.hide_suggestion()
         if not input_text:
+            self.workers.cancel('translate')
             self.output_text.config(state='normal')
             self.output_text.delete(1.0, tk.END)
             self.output_text.insert(1.0, "Translation will appear here...")
@@ -427,17 +465,30 @@ class UniversalTranslator:
         self.output_text.config(state='disabled')
         self.update_status("Translating...")
         
-        # Perform translation in background thread
-        def translate_in_background():
-            translated = self.translate_text(input_text, source_lang, target_lang)
+        # Perform translation on the worker pool, superseding any stale request
+        def translate_changed_sentences():
+            started = time.monotonic()
+            translated = self.incremental.translate(input_text, source_lang, target_lang)
+            if self.incremental.last_stats['translated']:
+                self.debounce.record_latency(time.monotonic() - started)
+            return translated
             
+        def on_translated(translated):
             # Update GUI in main thread
-            self.root.after(0, lambda: self.update_translation_output(translated, input_text, source_lang, target_lang))
+            self.root.after(0, lambda: self.update_translation_output(translated, input_text, source_lang, target_lang,
+                                                                      request_id))
             
-        threading.Thread(target=translate_in_background, daemon=True).start()
+        job = self.workers.submit(translate_changed_sentences,
+                                  key='translate', provider='translation', callback=on_translated)
+        if job is None:
+            self.update_status("Translator busy - try again shortly")
         
-    def update_translation_output(self, translated, source_text, source_lang, target_lang):
+    def update_translation_output(self, translated, source_text, source_lang, target_lang, request_id=None):
         """Update translation output in GUI"""
+        # A newer request was issued meanwhile, neither render nor save this one
+        if request_id is not None and not self.sequencer.is_current('translate', request_id):
+            return
+            
         self.output_text.config(state='normal')
         self.output_text.delete(1.0, tk.END)
         self.output_text.insert(1.0, translated)
@@ -449,18 +500,73 @@ class UniversalTranslator:
             
             # Auto-play if setting is enabled
             if self.settings.get('auto_play_audio', False):
+                # Synthesize now so the audio is ready when playback starts
+                self.prefetch_speech(translated, target_lang, 'speech_prefetch')
                 self.update_status("Auto-playing translation...")
                 # Delay auto-play slightly to let UI update
                 self.root.after(500, self.auto_play_translation)
         else:
             self.play_btn.config(state='disabled', bg='#e2e8f0', fg='#64748b')
         
-        # Save to database
-        if translated and not translated.startswith("Translation error"):
-            self.save_translation(source_text, translated, source_lang, target_lang)
+        # A similar past translation shown while the provider is down is not worth keeping
+        degraded = isinstance(translated, DegradedTranslation)
+        
+        # Save to database, replacing the partial sentence saved a moment ago
+        if translated and not translated.startswith("Translation error") and not degraded:
+            supersedes = None
+            last = self.last_saved_live
+            if (last and last[1:3] == (source_lang, target_lang) and
+                time.monotonic() - last[3] < 30 and last[0] != source_text and
+                (source_text.startswith(last[0]) or last[0].startswith(source_text))):
+                supersedes = last[0]
+            self.save_translation(source_text, translated, source_lang, target_lang, supersedes)
+            self.last_saved_live = (source_text, source_lang, target_lang, time.monotonic())
             
-        if not self.settings.get('auto_play_audio', False):
+        if degraded:
+            self.update_status(f"Provider unavailable - showing a similar past translation "
+                               f"({translated.score:.0%} match)")
+        elif not self.settings.get('auto_play_audio', False):
             self.update_status(f"Translated to {self.languages.get(target_lang, target_lang)}")
+            
+        if translated and not translated.startswith("Translation error") and not degraded:
+            self.suggest_from_memory(source_text, translated, source_lang, target_lang, request_id)
+        
+    def suggest_from_memory(self, source_text, translated, source_lang, target_lang, request_id):
+        """Look up a similar past translation in the background and offer it"""
+        def on_found(matches):
+            match = next((m for m in matches if m['score'] < 1.0 and m['translated_text'] != translated), None)
+            if match:
+                self.root.after(0, lambda: self.show_suggestion(match, request_id))
+                
+        self.workers.submit(self.engine.lookup_memory, source_text, source_lang, target_lang,
+                            key='memory_suggest', callback=on_found)
+        
+    def show_suggestion(self, match, request_id):
+        """Show a similar past translation under the output, labelled as such"""
+        if request_id is not None and not self.sequencer.is_current('translate', request_id):
+            return
+        self.suggestion = match
+        self.suggestion_label.config(
+            text=(f"💡 Similar past translation ({match['score']:.0%} match, click to use):\n"
+                  f"{match['source_text']} → {match['translated_text']}"))
+        self.suggestion_label.pack(fill='x', pady=(0, 10), after=self.output_text)
+        
+    def hide_suggestion(self):
+        """Remove the memory suggestion"""
+        self.suggestion = None
+        self.suggestion_label.pack_forget()
+        
+    def use_suggestion(self):
+        """Replace the output with the suggested past translation"""
+        if not self.suggestion:
+            return
+        translated = self.suggestion['translated_text']
+        self.output_text.config(state='normal')
+        self.output_text.delete(1.0, tk.END)
+        self.output_text.insert(1.0, translated)
+        self.output_text.config(state='disabled')
+        self.hide_suggestion()
+        self.update_status("Using similar past translation")
         
     def set_mode(self, mode):
         """Switch between translate and listen modes"""
@@ -485,6 +591,8 @@ class UniversalTranslator:
             
             self.update_status("Listening for incoming text...")
             
+        self.update_clipboard_watcher()
+            
     def create_autodetect_interface(self):
         """Create auto-detection interface"""
         # Clear existing widgets
@@ -524,7 +632,7 @@ class UniversalTranslator:
                 font=('Segoe UI', 10, 'bold')).pack(side='left')
         
         self.auto_play_btn = tk.Button(auto_header, text="🔊", 
-                                     command=self.play_auto_translation_audio,
+                                     command=lambda: self.on_play_button(self.auto_play_btn, self.play_auto_translation_audio),
                                      bg='#e2e8f0', fg='#64748b', bd=0, padx=8, pady=2,
                                      font=('Segoe UI', 12), state='disabled')
         self.auto_play_btn.pack(side='right')
@@ -552,49 +660,43 @@ class UniversalTranslator:
         self.auto_copy_btn.pack(side='left', padx=5)
         
     def start_clipboard_monitor(self):
-        """Start monitoring clipboard for changes"""
-        def monitor_clipboard():
-            # Wait for complete initialization
-            while not hasattr(self, 'current_mode') or not hasattr(self, 'last_clipboard') or not hasattr(self, 'settings'):
-                time.sleep(0.1)
-                
-            while True:
-                try:
-                    if (hasattr(self, 'current_mode') and 
-                        hasattr(self, 'settings') and 
-                        hasattr(self, 'last_clipboard') and
-                        self.current_mode == 'listen' and 
-                        self.settings['clipboard_monitor']):
-                        
-                        try:
-                            import pyperclip
-                            current_clipboard = pyperclip.paste()
-                            
-                            if (current_clipboard != self.last_clipboard and 
-                                current_clipboard.strip() and 
-                                len(current_clipboard) > 5):
-                                
-                                self.last_clipboard = current_clipboard
-                                
-                                # Detect if text is not in English
-                                detected_lang = self.detect_language(current_clipboard)
-                                
-                                if detected_lang != 'en':
-                                    self.root.after(0, lambda text=current_clipboard, lang=detected_lang: 
-                                                   self.process_detected_text(text, lang))
-                                    
-                        except Exception as e:
-                            print(f"Inner clipboard error: {e}")
-                            
-                except Exception as e:
-                    # Only print error if not an initialization issue
-                    if hasattr(self, 'current_mode'):
-                        print(f"Clipboard monitoring error: {e}")
-                        
-                time.sleep(1)  # Check every second
-                
-        threading.Thread(target=monitor_clipboard, daemon=True).start()
+        """Start watching the clipboard for changes"""
+        # Event-driven where the platform allows it, adaptive polling otherwise
+        self.clipboard_watcher = create_clipboard_watcher(self.on_clipboard_change)
+        self.clipboard_watcher.start()
+        self.update_clipboard_watcher()
+        
+    def update_clipboard_watcher(self):
+        """Only listen to the clipboard in auto-detect mode with monitoring enabled"""
+        if not hasattr(self, 'clipboard_watcher'):
+            return
+            
+        active = self.current_mode == 'listen' and self.settings['clipboard_monitor']
+        was_active = self.clipboard_watcher.active
+        self.clipboard_watcher.set_active(active)
+        
+        # Pick up text copied before listening was switched on
+        if active and not was_active:
+            self.workers.submit(self.clipboard_watcher.check, key='clipboard_check')
+            
+    def on_clipboard_change(self, text):
+        """Handle new clipboard text (called from the watcher thread)"""
+        if not text.strip() or len(text) <= 5:
+            return
+            
+        # Detect on the worker pool so the watcher stays responsive
+        self.workers.submit(self.handle_clipboard_text, text, key='clipboard')
         
+    def handle_clipboard_text(self, text):
+        """Detect the language of clipboard text and hand foreign text to the UI"""
+        self.last_clipboard = text
+        
+        # Detect if text is not in English
+        detected_lang = self.detect_language(text)
+        
+        if detected_lang != 'en':
+            self.root.after(0, lambda: self.process_detected_text(text, detected_lang))
+            
     def process_detected_text(self, text, detected_lang):
         """Process detected foreign language text"""
         if not hasattr(self, 'detected_frame'):
@@ -617,15 +719,32 @@ class UniversalTranslator:
         lang_name = self.languages.get(detected_lang, detected_lang)
         self.update_status(f"Detected {lang_name} text")
         
-        # Translate in background
-        def translate_detected():
-            translated = self.translate_text(text, detected_lang, 'en')
-            self.root.after(0, lambda: self.update_auto_translation(translated, text, detected_lang))
+        # Translate on the worker pool, only the latest clipboard text matters
+        request_id = self.sequencer.next('auto_translate')
+        
+        if self.async_engine is not None:
+            # Awaited on the backend's event loop, the result comes back on the Tk thread
+            def on_result(result):
+                if isinstance(result, Exception):
+                    result = f"Translation error: {result}"
+                self.update_auto_translation(result, text, detected_lang, request_id)
+                
+            self.async_engine.submit(text, detected_lang, 'en', callback=on_result, root=self.root)
+            return
+        
+        def on_translated(translated):
+            self.root.after(0, lambda: self.update_auto_translation(translated, text, detected_lang, request_id))
             
-        threading.Thread(target=translate_detected, daemon=True).start()
+        job = self.workers.submit(self.translate_text, text, detected_lang, 'en',
+                                  key='auto_translate', provider='translation', callback=on_translated)
+        if job is None:
+            self.update_status("Translator busy - clipboard text skipped")
         
-    def update_auto_translation(self, translated, source_text, source_lang):
+    def update_auto_translation(self, translated, source_text, source_lang, request_id=None):
         """Update auto-translation result"""
+        if request_id is not None and not self.sequencer.is_current('auto_translate', request_id):
+            return
+            
         self.auto_translation.config(state='normal')
         self.auto_translation.delete(1.0, tk.END)
         self.auto_translation.insert(1.0, translated)
@@ -637,21 +756,27 @@ class UniversalTranslator:
             
             # Auto-play if setting is enabled
             if self.settings.get('auto_play_audio', False):
+                self.prefetch_speech(translated, 'en', 'auto_speech_prefetch')
                 self.update_status("Auto-playing auto-translation...")
                 # Delay auto-play slightly to let UI update
                 self.root.after(500, self.auto_play_auto_translation)
         else:
             self.auto_play_btn.config(state='disabled', bg='#e2e8f0', fg='#64748b')
         
+        degraded = isinstance(translated, DegradedTranslation)
+        
         # Save to database
-        if translated and not translated.startswith("Translation error"):
+        if translated and not translated.startswith("Translation error") and not degraded:
             self.save_translation(source_text, translated, source_lang, 'en')
             
-        # Auto-insert if enabled
-        if self.settings['auto_insert']:
+        # Auto-insert if enabled, never a stand-in the user has not looked at
+        if self.settings['auto_insert'] and not degraded:
             self.root.after(1000, self.insert_auto_translation)
             
-        if not self.settings.get('auto_play_audio', False):
+        if degraded:
+            self.update_status(f"Provider unavailable - showing a similar past translation "
+                               f"({translated.score:.0%} match)")
+        elif not self.settings.get('auto_play_audio', False):
             self.update_status("Auto-translation ready")
         
     def swap_languages(self):
@@ -731,6 +856,10 @@ class UniversalTranslator:
                 
     def clear_all(self):
         """Clear all text areas"""
+        self.sequencer.invalidate('translate')
+        self.workers.cancel('translate')
+        self.pending_input = ""
+        self.hide_suggestion()
         self.input_text.delete(1.0, tk.END)
         self.output_text.config(state='normal')
         self.output_text.delete(1.0, tk.END)
@@ -740,6 +869,143 @@ class UniversalTranslator:
         self.play_btn.config(state='disabled', bg='#e2e8f0', fg='#64748b')
         self.update_status("Cleared")
         
+    def open_history_browser(self):
+        """Open the translation history browser"""
+        if self.history_window is not None and self.history_window.winfo_exists():
+            self.history_window.lift()
+            return
+            
+        self.history_window = tk.Toplevel(self.root)
+        self.history_window.title("📜 Translation History")
+        self.history_window.geometry("620x460")
+        self.history_window.configure(bg='#f0f2f5')
+        
+        # Search box
+        search_frame = tk.Frame(self.history_window, bg='#f0f2f5')
+        search_frame.pack(fill='x', padx=10, pady=10)
+        
+        tk.Label(search_frame, text="Search:", bg='#f0f2f5', 
+                font=('Segoe UI', 10)).pack(side='left')
+        
+        self.history_search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=self.history_search_var, 
+                               font=('Segoe UI', 10))
+        search_entry.pack(side='left', fill='x', expand=True, padx=(5, 0))
+        search_entry.bind('<KeyRelease>', self.on_history_search)
+        search_entry.focus_set()
+        
+        # Results list, filled page by page as it is scrolled
+        list_frame = tk.Frame(self.history_window, bg='#f0f2f5')
+        list_frame.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+        
+        columns = ('time', 'langs', 'source', 'translation')
+        self.history_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
+        for column, heading, width in (('time', 'Time', 120), ('langs', 'Languages', 70),
+                                       ('source', 'Source', 200), ('translation', 'Translation', 200)):
+            self.history_tree.heading(column, text=heading)
+            self.history_tree.column(column, width=width, stretch=column in ('source', 'translation'))
+            
+        self.history_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', 
+                                              command=self.history_tree.yview)
+        self.history_tree.configure(yscrollcommand=self.on_history_scroll)
+        self.history_tree.pack(side='left', fill='both', expand=True)
+        self.history_scrollbar.pack(side='right', fill='y')
+        self.history_tree.bind('<Double-1>', self.on_history_select)
+        
+        self.history_rows = {}
+        self.reset_history_browser()
+        
+    def on_history_search(self, event=None):
+        """Debounce history searches while typing"""
+        if hasattr(self, 'history_search_timer'):
+            self.root.after_cancel(self.history_search_timer)
+        self.history_search_timer = self.root.after(300, self.reset_history_browser)
+        
+    def reset_history_browser(self):
+        """Clear the history list and load the first page for the current search"""
+        if self.history_window is None or not self.history_window.winfo_exists():
+            return
+            
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.history_rows = {}
+        self.history_query = self.history_search_var.get().strip()
+        self.history_cursor = None
+        self.history_exhausted = False
+        self.history_loading = False
+        # Pages requested for an older search are dropped when they arrive
+        self.history_request_id = self.sequencer.next('history')
+        self.load_history_page()
+        
+    def on_history_scroll(self, first, last):
+        """Load the next page when the list is scrolled near its end"""
+        self.history_scrollbar.set(first, last)
+        if float(last) > 0.9:
+            self.load_history_page()
+            
+    def load_history_page(self):
+        """Fetch the next page of history in the background"""
+        if self.history_loading or self.history_exhausted:
+            return
+        self.history_loading = True
+        request_id = self.history_request_id
+        
+        def on_page(page):
+            rows, cursor = page
+            self.root.after(0, lambda: self.show_history_page(rows, cursor, request_id))
+            
+        def on_error(error):
+            print(f"History search error: {error}")
+            self.root.after(0, lambda: self.show_history_page([], None, request_id))
+            
+        self.workers.submit(self.engine.search_history, self.history_query, 
+                            before=self.history_cursor, limit=50,
+                            callback=on_page, error_callback=on_error)
+        
+    def show_history_page(self, rows, cursor, request_id):
+        """Append a page of history rows to the browser"""
+        if not self.sequencer.is_current('history', request_id):
+            return
+        if self.history_window is None or not self.history_window.winfo_exists():
+            return
+            
+        for row in rows:
+            item = str(row['id'])
+            self.history_rows[item] = row
+            self.history_tree.insert('', 'end', iid=item, values=(
+                row['timestamp'],
+                f"{row['source_lang']} → {row['target_lang']}",
+                (row['source_text'] or '').replace('\n', ' ')[:200],
+                (row['translated_text'] or '').replace('\n', ' ')[:200],
+            ))
+            
+        self.history_cursor = cursor
+        self.history_exhausted = cursor is None
+        self.history_loading = False
+        
+        # Keep loading until the list can scroll
+        if self.history_tree.yview()[1] > 0.9:
+            self.load_history_page()
+        
+    def on_history_select(self, event=None):
+        """Load the double-clicked history entry back into the translator"""
+        selection = self.history_tree.selection()
+        if not selection:
+            return
+        row = self.history_rows.get(selection[0])
+        if row is None:
+            return
+            
+        if self.current_mode != 'translate':
+            self.set_mode('translate')
+        self.input_text.delete(1.0, tk.END)
+        self.input_text.insert(1.0, row['source_text'] or '')
+        if row['source_lang'] in self.languages:
+            self.from_lang.set(self.languages[row['source_lang']])
+        if row['target_lang'] in self.languages:
+            self.to_lang.set(self.languages[row['target_lang']])
+        # Served from the translation cache
+        self.perform_translation()
+        
     def minimize_window(self):
         """Minimize window to taskbar"""
         self.root.iconify()
@@ -749,6 +1015,7 @@ class UniversalTranslator:
         self.settings['auto_insert'] = self.auto_insert_var.get()
         self.settings['clipboard_monitor'] = self.clip_monitor_var.get()
         self.settings['auto_play_audio'] = self.auto_play_var.get()
+        self.update_clipboard_watcher()
         
         # Update status message
         if self.auto_play_var.get():
@@ -756,6 +1023,15 @@ class UniversalTranslator:
         else:
             self.update_status("Auto-play audio disabled")
         
+    def toggle_auto_memory(self):
+        """Serve similar past translations without asking, or only identical ones"""
+        self.settings['auto_memory'] = self.auto_memory_var.get()
+        self.engine.memory_threshold = 0.95 if self.settings['auto_memory'] else None
+        if self.settings['auto_memory']:
+            self.update_status("Similar past translations are used automatically")
+        else:
+            self.update_status("Similar past translations are only suggested")
+        
     def toggle_always_on_top(self):
         """Toggle always on top setting"""
         self.settings['always_on_top'] = self.always_top_var.get()
@@ -776,50 +1052,17 @@ class UniversalTranslator:
             self.status_text.config(text="Listening for incoming text...")
             
     def text_to_speech(self, text, language='en'):
-        """Convert text to speech and return audio file path"""
-        try:
-            if not text.strip():
-                return None
-            
-            # Import gTTS with error handling
-            try:
-                from gtts import gTTS
-            except ImportError:
-                print("gTTS package not available")
-                return None
-                
-            # Create TTS object
-            tts = gTTS(text=text, lang=language, slow=False)
-            
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-            temp_file.close()
-            
-            # Save audio to temporary file
-            tts.save(temp_file.name)
-            
-            return temp_file.name
-            
-        except Exception as e:
-            print(f"TTS error: {e}")
-            return None
+        """Convert text to speech and return the encoded audio"""
+        return self.engine.synthesize_audio(text, language)
     
-    def play_audio_file(self, file_path):
-        """Play audio file using pygame"""
-        try:
-            if not file_path or not os.path.exists(file_path):
-                return False
-                
-            pygame.mixer.music.load(file_path)
-            pygame.mixer.music.play()
-            
-            return True
-            
-        except Exception as e:
-            print(f"Audio playback error: {e}")
-            return False
+    def on_play_button(self, button, play):
+        """Play button: stop the audio it is playing, otherwise start it"""
+        if self.speaking_button is button:
+            self.audio.stop()
+        else:
+            play()
     
-    def play_translation_audio(self):
+    def play_translation_audio(self, replace=True):
         """Play audio for current translation"""
         translation = self.output_text.get(1.0, tk.END).strip()
         if not translation or translation == "Translation will appear here...":
@@ -828,24 +1071,9 @@ class UniversalTranslator:
         # Get target language
         target_lang = self.get_language_code(self.to_lang.get())
         
-        # Update button to show loading
-        self.play_btn.config(text="🔄", state='disabled')
-        self.update_status("Generating audio...")
-        
-        def generate_and_play():
-            # Generate audio file
-            audio_file = self.text_to_speech(translation, target_lang)
-            
-            if audio_file:
-                # Update UI and play audio
-                self.root.after(0, lambda: self.play_audio_and_update_ui(audio_file, self.play_btn, "Translation audio"))
-            else:
-                # Reset button if failed
-                self.root.after(0, lambda: self.reset_play_button(self.play_btn))
-                
-        threading.Thread(target=generate_and_play, daemon=True).start()
+        self.speak(translation, target_lang, self.play_btn, "Translation audio", replace)
     
-    def play_auto_translation_audio(self):
+    def play_auto_translation_audio(self, replace=True):
         """Play audio for auto-translation"""
         if not hasattr(self, 'auto_translation'):
             return
@@ -855,44 +1083,41 @@ class UniversalTranslator:
             return
         
         # Auto-translations are always in English
-        self.auto_play_btn.config(text="🔄", state='disabled')
+        self.speak(translation, 'en', self.auto_play_btn, "Auto-translation audio", replace)
+    
+    def prefetch_speech(self, text, language, field):
+        """Start synthesizing a fresh translation in the background, cancelled once it is stale"""
+        if self.audio is None:
+            return
+        request_id = self.sequencer.next(field)
+        self.workers.submit(self.engine.prefetch_speech, text, language,
+                            lambda: self.sequencer.is_current(field, request_id),
+                            key=field, provider='tts')
+    
+    def speak(self, text, language, button, description, replace=True):
+        """Synthesize text sentence by sentence and hand it to the audio controller"""
+        if self.audio is None:
+            return
+        
+        # Update button to show loading
+        button.config(text="🔄", state='disabled')
         self.update_status("Generating audio...")
         
-        def generate_and_play():
-            audio_file = self.text_to_speech(translation, 'en')
+        def on_start():
+            self.root.after(0, lambda: self.show_speaking(button, description))
             
-            if audio_file:
-                self.root.after(0, lambda: self.play_audio_and_update_ui(audio_file, self.auto_play_btn, "Auto-translation audio"))
-            else:
-                self.root.after(0, lambda: self.reset_play_button(self.auto_play_btn))
-                
-        threading.Thread(target=generate_and_play, daemon=True).start()
+        def on_done(completed):
+            self.root.after(0, lambda: self.reset_play_button(button))
+        
+        self.audio.play(self.engine.stream_speech(text, language), on_start, on_done, replace=replace)
     
-    def play_audio_and_update_ui(self, audio_file, button, description):
-        """Play audio and update UI"""
-        # Clean up previous audio file
-        if self.current_audio_file and os.path.exists(self.current_audio_file):
-            try:
-                os.unlink(self.current_audio_file)
-            except:
-                pass
-        
-        # Play new audio
-        if self.play_audio_file(audio_file):
-            self.current_audio_file = audio_file
-            self.update_status(f"Playing {description}")
-            
-            # Monitor playback and reset button when done
-            def monitor_playback():
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1)
-                
-                # Reset button when playback is done
-                self.root.after(0, lambda: self.reset_play_button(button))
-                
-            threading.Thread(target=monitor_playback, daemon=True).start()
-        else:
-            self.reset_play_button(button)
+    def show_speaking(self, button, description):
+        """Turn the play button into a stop button while its audio plays"""
+        if self.speaking_button is not None and self.speaking_button is not button:
+            self.reset_play_button(self.speaking_button)
+        self.speaking_button = button
+        button.config(text="⏹", state='normal')
+        self.update_status(f"Playing {description}")
     
     def auto_play_translation(self):
         """Auto-play the main translation"""
@@ -900,12 +1125,14 @@ class UniversalTranslator:
             self.play_translation_audio()
     
     def auto_play_auto_translation(self):
-        """Auto-play the auto-detected translation"""
+        """Auto-play the auto-detected translation, after anything still being spoken"""
         if self.settings.get('auto_play_audio', False):
-            self.play_auto_translation_audio()
+            self.play_auto_translation_audio(replace=False)
 
     def reset_play_button(self, button):
         """Reset play button to normal state"""
+        if self.speaking_button is button:
+            self.speaking_button = None
         button.config(text="🔊", state='normal', bg='#4facfe', fg='white')
         self.update_status("Audio ready")
 
@@ -940,16 +1167,28 @@ class UniversalTranslator:
     def on_closing(self):
         """Handle application closing"""
         try:
-            # Clean up audio file
-            if hasattr(self, 'current_audio_file') and self.current_audio_file and os.path.exists(self.current_audio_file):
+            # Stop playback, clips stay in the audio cache
+            if getattr(self, 'audio', None) is not None:
                 try:
-                    pygame.mixer.music.stop()
-                    os.unlink(self.current_audio_file)
+                    self.audio.close()
                 except:
                     pass
             
+            # Stop watching the clipboard
+            if hasattr(self, 'clipboard_watcher'):
+                self.clipboard_watcher.stop()
+            
+            # Drop queued background work
+            if hasattr(self, 'workers'):
+                self.workers.shutdown()
+            
+            # Close the engine, flushing queued history writes
+            if hasattr(self, 'engine'):
+                self.engine.close()
+            
             # Quit pygame mixer
-            if hasattr(self, 'audio_enabled') and self.audio_enabled:
+            if getattr(self, 'audio_enabled', False):
+                import pygame
                 pygame.mixer.quit()
             
             # Unhook keyboard listeners
@@ -961,6 +1200,31 @@ class UniversalTranslator:
         sys.exit()
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Universal Translation Widget")
+    parser.add_argument('--backend', default=os.environ.get('TRANSLATOR_BACKEND', 'googletrans'),
+                        help="Translation backend: googletrans, http or offline")
+    parser.add_argument('--offline-dictionary', default=os.environ.get('TRANSLATOR_OFFLINE_DICT'),
+                        help="JSON phrase table for the offline backend")
+    parser.add_argument('--backend-url', default=os.environ.get('TRANSLATOR_URL', 'http://127.0.0.1:5000'),
+                        help="LibreTranslate-compatible service for the http backend")
+    parser.add_argument('--fallback-backend', default=os.environ.get('TRANSLATOR_FALLBACK'),
+                        help="Backend used while the primary is throttled or failing")
+    parser.add_argument('--hedge-after', type=float,
+                        help="Also ask the fallback backend when the primary takes longer than this many seconds")
+    parser.add_argument('--synthesizer', default=os.environ.get('TRANSLATOR_TTS', 'gtts'),
+                        help="Text-to-speech engine: gtts or tone (offline stand-in)")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="Print how long each startup phase took")
+    args = parser.parse_args()
+    
+    backend_options = {}
+    if args.backend == 'offline' and args.offline_dictionary:
+        backend_options['dictionary_path'] = args.offline_dictionary
+    if args.backend == 'http':
+        backend_options['base_url'] = args.backend_url
+    
     # Install required packages if not available
     required_packages = [
         'googletrans==4.0.0rc1',
@@ -981,7 +1245,9 @@ if __name__ == "__main__":
     print("\nStarting application...\n")
     
     try:
-        app = UniversalTranslator()
+        app = UniversalTranslator(backend=args.backend, backend_options=backend_options,
+                                  synthesizer=args.synthesizer, startup_report=args.startup_report,
+                                  fallback_backend=args.fallback_backend, hedge_after=args.hedge_after)
         app.run()
     except Exception as e:
         print(f"Error starting application: {e}")
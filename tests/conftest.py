@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The package sits next to the widget script, not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,79 @@
+import time
+
+from translator_core.cache import MemoryCache, TranslationCache, make_cache_key, normalize_text
+
+
+def test_cache_key_ignores_spacing_but_not_line_breaks():
+    assert make_cache_key('Hello  world ', 'en', 'es') == make_cache_key('Hello world', 'en', 'es')
+    assert make_cache_key('Hello\tworld', 'en', 'es') == make_cache_key('Hello world', 'en', 'es')
+    assert make_cache_key('Line one\r\nLine two', 'en', 'es') == make_cache_key('Line one\nLine two', 'en', 'es')
+    assert make_cache_key('Line one\nLine two', 'en', 'es') != make_cache_key('Line one Line two', 'en', 'es')
+    assert normalize_text('  a  b \n  c ') == 'a b\nc'
+
+
+def test_cache_key_depends_on_languages():
+    assert make_cache_key('Hello', 'en', 'es') != make_cache_key('Hello', 'en', 'fr')
+    assert make_cache_key('Hello', None, 'es') == make_cache_key('Hello', 'auto', 'es')
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2, ttl=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = TranslationCache(path)
+    cache.put('Hello', 'en', 'es', 'Hola')
+    cache.put_many([('One', 'Uno'), ('Two', 'Dos')], 'en', 'es')
+    cache.close()
+
+    cache = TranslationCache(path)
+    try:
+        assert cache.get('Hello', 'en', 'es') == 'Hola'
+        assert cache.get('Two', 'en', 'es') == 'Dos'
+        assert cache.get('Hello', 'en', 'fr') is None
+        stats = cache.stats()
+        assert stats['disk_hits'] == 2 and stats['misses'] == 1
+    finally:
+        cache.close()
+
+
+def test_prune_by_age_and_rows_keeps_recently_used(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'cache.db'))
+    try:
+        cache.put_many([(f"text {index}", f"texto {index}") for index in range(10)], 'en', 'es')
+        with cache._lock:
+            cache.conn.execute('UPDATE translation_cache SET last_used = ?', (time.time() - 10 * 86400,))
+            cache.conn.commit()
+        cache.memory.clear()
+        # A disk hit marks the entry used, even though the write is deferred
+        assert cache.get('text 3', 'en', 'es') == 'texto 3'
+
+        assert cache.prune(max_age_days=5) == 9
+        cache.memory.clear()
+        assert cache.get('text 3', 'en', 'es') == 'texto 3'
+
+        cache.put_many([(f"new {index}", "nuevo") for index in range(5)], 'en', 'es')
+        cache.prune(max_rows=3)
+        count = cache.conn.execute('SELECT COUNT(*) FROM translation_cache').fetchone()[0]
+        assert count == 3
+    finally:
+        cache.close()
+
+
+def test_prune_by_bytes(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'cache.db'))
+    try:
+        cache.put_many([(f"text {index}", 'x' * 500) for index in range(2000)], 'en', 'es')
+        limit = cache.size_bytes() // 2
+        assert cache.prune(max_bytes=limit) > 0
+        assert cache.size_bytes() <= limit
+        assert cache.conn.execute('SELECT COUNT(*) FROM translation_cache').fetchone()[0] > 0
+    finally:
+        cache.close()
@@ -0,0 +1,154 @@
+import sqlite3
+
+from translator_core.history import HistoryStore, RetentionPolicy
+
+
+def make_baseline_db(path, rows):
+    """Create a history database the way the widget did before deduplication"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE translations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_text TEXT,
+            translated_text TEXT,
+            source_lang TEXT,
+            target_lang TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany('INSERT INTO translations (source_text, translated_text, source_lang, target_lang, '
+                     'timestamp) VALUES (?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def test_dedup_migration_folds_duplicates(tmp_path):
+    path = str(tmp_path / 'history.db')
+    make_baseline_db(path, [
+        ('Hello', 'Hola', 'en', 'es', '2024-01-01 10:00:00'),
+        ('Hello  ', 'Hola', 'en', 'es', '2024-01-02 10:00:00'),
+        ('Hello', 'Bonjour', 'en', 'fr', '2024-01-01 10:00:00'),
+        ('Hello', 'Hola!', 'en', 'es', '2024-01-03 10:00:00'),
+        (None, None, 'en', 'es', '2024-01-01 10:00:00'),
+    ])
+
+    store = HistoryStore(path)
+    try:
+        rows = store.read_conn.execute(
+            'SELECT source_text, translated_text, target_lang, hit_count, timestamp, last_seen '
+            'FROM translations ORDER BY target_lang, source_text').fetchall()
+    finally:
+        store.close()
+
+    rows = [tuple(row) for row in rows]
+    assert ('Hello', 'Bonjour', 'fr', 1, '2024-01-01 10:00:00', '2024-01-01 10:00:00') in rows
+    # Whitespace variants fold into the row written last, keeping the first timestamp and the last sighting
+    spanish = [row for row in rows if row[2] == 'es' and row[0]]
+    assert len(spanish) == 1
+    assert spanish[0][1:] == ('Hola!', 'es', 3, '2024-01-01 10:00:00', '2024-01-03 10:00:00')
+    assert len(rows) == 3
+
+
+def test_migrated_database_accepts_new_duplicates(tmp_path):
+    path = str(tmp_path / 'history.db')
+    make_baseline_db(path, [('Hello', 'Hola', 'en', 'es', '2024-01-01 10:00:00')])
+
+    store = HistoryStore(path)
+    store.add('Hello', 'Hola', 'en', 'es')
+    store.close()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT COUNT(*), SUM(hit_count) FROM translations').fetchone() == (1, 2)
+    conn.close()
+
+
+def test_close_flushes_queued_writes(tmp_path):
+    path = str(tmp_path / 'history.db')
+    store = HistoryStore(path, batch_size=1000, flush_interval=60)
+    for index in range(500):
+        store.add(f"text {index}", f"texto {index}", 'en', 'es')
+    store.close()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0] == 500
+    conn.close()
+
+
+def test_add_after_close_raises(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.close()
+    try:
+        store.add('Hello', 'Hola', 'en', 'es')
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("add() after close() should raise")
+
+
+def test_search_pages_and_supersedes(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    try:
+        store.add('Hel', 'Hol', 'en', 'es')
+        store.flush()
+        store.add('Hello there', 'Hola', 'en', 'es', supersedes='Hel')
+        for index in range(5):
+            store.add(f"line {index}", f"linea {index}", 'en', 'es')
+        store.flush()
+
+        texts = [row['source_text'] for row in store.search(limit=100)[0]]
+        assert 'Hel' not in texts
+        assert 'Hello there' in texts
+
+        page, cursor = store.search(limit=4)
+        rest, end = store.search(before=cursor, limit=4)
+        assert len(page) == 4 and len(rest) == 2 and end is None
+        assert not {row['id'] for row in page} & {row['id'] for row in rest}
+    finally:
+        store.close()
+
+
+def test_retention_byte_limit_ignores_other_tables(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    try:
+        for index in range(2000):
+            store.add(f"history sentence {index} " * 3, f"frase {index} " * 10, 'en', 'es')
+        store.flush()
+        # A large unrelated table in the same file must not cost history rows
+        with store.lock:
+            store.conn.execute('CREATE TABLE filler (blob TEXT)')
+            store.conn.executemany('INSERT INTO filler VALUES (?)', [('x' * 1000,)] * 5000)
+            store.conn.commit()
+
+        limit = store.history_bytes() // 2
+        store.apply_retention(RetentionPolicy(max_age_days=None, max_rows=None, max_bytes=limit))
+        remaining = store.read_conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+        assert 0 < remaining < 2000
+    finally:
+        store.close()
+
+
+def test_small_database_switches_to_incremental_vacuum_on_open(tmp_path):
+    path = str(tmp_path / 'history.db')
+    make_baseline_db(path, [('Hello', 'Hola', 'en', 'es', '2024-01-01 10:00:00')])
+
+    store = HistoryStore(path)
+    try:
+        assert store.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+        assert store.enable_incremental_vacuum() is False
+    finally:
+        store.close()
+
+
+def test_maintenance_never_runs_a_full_vacuum(tmp_path, monkeypatch):
+    path = str(tmp_path / 'history.db')
+    make_baseline_db(path, [('Hello', 'Hola', 'en', 'es', '2024-01-01 10:00:00')])
+    monkeypatch.setattr(HistoryStore, 'CONVERT_ON_OPEN_BYTES', 0)
+
+    store = HistoryStore(path)
+    try:
+        store.compact(RetentionPolicy())
+        assert store.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+        assert store.enable_incremental_vacuum() is True
+        assert store.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    finally:
+        store.close()
@@ -0,0 +1,48 @@
+from translator_core.history import HistoryStore
+from translator_core.memory import TranslationMemory, edit_distance
+
+
+def make_memory(tmp_path, rows=()):
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    for row in rows:
+        history.add(*row)
+    history.flush()
+    return history, TranslationMemory(history)
+
+
+def test_edit_distance():
+    assert edit_distance('kitten', 'sitting') == 3
+    assert edit_distance('same', 'same') == 0
+    assert edit_distance('abc', 'abcdefgh', max_distance=2) == 3
+
+
+def test_only_case_sensitive_match_is_exact(tmp_path):
+    history, memory = make_memory(tmp_path)
+    try:
+        memory.add('polish the table', 'pulir la mesa', 'en', 'es')
+        assert memory.best_servable('polish  the table', 'en', 'es', 1.0)['translated_text'] == 'pulir la mesa'
+        assert memory.best_servable('Polish the table', 'en', 'es', 1.0) is None
+        # Still offered as a near match
+        assert memory.lookup('Polish the table', 'en', 'es')[0]['score'] < 1.0
+    finally:
+        history.close()
+
+
+def test_numbers_must_match(tmp_path):
+    history, memory = make_memory(tmp_path)
+    try:
+        memory.add('Your order 123 has shipped', 'Pedido 123 enviado', 'en', 'es')
+        assert memory.best_servable('Your order 124 has shipped', 'en', 'es', 0.9) is None
+        assert memory.best_servable('Your order 123 has shipped!', 'en', 'es', 0.9) is not None
+    finally:
+        history.close()
+
+
+def test_load_keeps_entries_added_meanwhile(tmp_path):
+    history, memory = make_memory(tmp_path, [('Hello', 'Hola (old)', 'en', 'es')])
+    try:
+        memory.add('Hello', 'Hola', 'en', 'es')
+        memory.load(background=False)
+        assert memory.best_servable('Hello', 'en', 'es', 1.0)['translated_text'] == 'Hola'
+    finally:
+        history.close()
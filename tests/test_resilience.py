@@ -0,0 +1,71 @@
+from translator_core.aio import HTTPError
+from translator_core.backends import OfflineBackend
+from translator_core.engine import TranslatorEngine
+from translator_core.resilience import CircuitBreaker, ResilientBackend, TokenBucket, is_provider_failure
+
+
+class FailingBackend(OfflineBackend):
+    name = 'failing'
+
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+        self.calls = []
+
+    def translate(self, text, source_lang, target_lang):
+        self.calls.append(source_lang)
+        raise self.error
+
+
+def test_provider_failures_are_classified():
+    assert is_provider_failure(ConnectionError("refused"))
+    assert is_provider_failure(TimeoutError())
+    assert is_provider_failure(HTTPError(429))
+    assert is_provider_failure(HTTPError(503))
+    assert not is_provider_failure(HTTPError(400))
+    assert not is_provider_failure(ValueError("invalid source language"))
+    assert not is_provider_failure(TypeError("bad call"))
+
+
+def test_client_errors_do_not_open_the_breaker():
+    backend = ResilientBackend(FailingBackend(ValueError("invalid source language")), failure_threshold=2)
+    for _ in range(5):
+        try:
+            backend.translate('Hello', 'xx', 'es')
+        except ValueError:
+            pass
+    snapshot = backend.backend_stats()['primary']
+    assert snapshot['state'] == CircuitBreaker.CLOSED
+    assert snapshot['client_errors'] == 5
+
+
+def test_transport_errors_open_the_breaker():
+    backend = ResilientBackend(FailingBackend(ConnectionError("refused")), failure_threshold=2)
+    for _ in range(2):
+        try:
+            backend.translate('Hello', 'en', 'es')
+        except ConnectionError:
+            pass
+    assert backend.backend_stats()['primary']['state'] == CircuitBreaker.OPEN
+
+
+def test_no_auto_retry_after_provider_failure(tmp_path):
+    engine = TranslatorEngine(backend='offline', synthesizer='tone', data_dir=str(tmp_path))
+    try:
+        failing = FailingBackend(HTTPError(429))
+        engine._translator = ResilientBackend(failing)
+        assert engine.translate_text('Hello', 'en', 'es').startswith("Translation error")
+        assert failing.calls == ['en']
+
+        failing = FailingBackend(ValueError("invalid source language"))
+        engine._translator = ResilientBackend(failing)
+        engine.translate_text('Hello', 'xx', 'es')
+        assert failing.calls == ['xx', 'auto']
+    finally:
+        engine.close()
+
+
+def test_token_bucket_refuses_beyond_burst():
+    bucket = TokenBucket(rate=1, burst=2)
+    assert bucket.acquire() and bucket.acquire()
+    assert not bucket.acquire(max_wait=0.0)
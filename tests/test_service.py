@@ -0,0 +1,137 @@
+import http.client
+import json
+
+import pytest
+
+from translator_core.engine import TranslatorEngine
+from translator_core.service import MAX_BODY_BYTES, TranslationService
+
+
+@pytest.fixture
+def service(tmp_path):
+    engine = TranslatorEngine(backend='offline', synthesizer='tone', data_dir=str(tmp_path))
+    service = TranslationService(engine, port=0).start()
+    yield service
+    service.stop()
+    engine.close()
+
+
+def post(conn, path, body, headers=None):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    conn.request('POST', path, body=data, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b'null')
+
+
+def connect(service):
+    return http.client.HTTPConnection('127.0.0.1', service.port, timeout=5)
+
+
+def test_translate_and_health(service):
+    conn = connect(service)
+    status, body = post(conn, '/translate', {'text': 'Hello', 'source': 'en', 'target': 'de'})
+    assert status == 200
+    assert body == {'translation': '[de] Hello', 'source': 'en', 'target': 'de'}
+    conn.request('GET', '/health')
+    assert conn.getresponse().status == 200
+
+
+def test_source_auto_is_passed_through(service):
+    status, body = post(connect(service), '/translate', {'text': 'Hello', 'target': 'de'})
+    assert status == 200 and body['source'] == 'auto'
+
+
+def test_client_errors(service):
+    conn = connect(service)
+    assert post(conn, '/translate', {'target': 'de'})[0] == 400
+    assert post(conn, '/translate', b'{not json')[0] == 400
+    assert post(conn, '/translate', [1, 2])[0] == 400
+    assert post(conn, '/translate_batch', {'texts': ['a', 1], 'target': 'de'})[0] == 400
+
+
+def test_unknown_route_keeps_connection_usable(service):
+    conn = connect(service)
+    assert post(conn, '/nope', {'text': 'x' * 1000})[0] == 404
+    # The 404's body must not be read as the next request
+    assert post(conn, '/translate', {'text': 'Hello', 'source': 'en', 'target': 'de'})[0] == 200
+
+
+def test_oversized_body_is_refused(service):
+    conn = connect(service)
+    conn.putrequest('POST', '/translate')
+    conn.putheader('Content-Length', str(MAX_BODY_BYTES + 1))
+    conn.endheaders()
+    response = conn.getresponse()
+    assert response.status == 413
+    assert response.getheader('Connection') == 'close'
+
+
+@pytest.mark.parametrize('length', ['abc', '-5'])
+def test_bad_content_length_is_400(service, length):
+    conn = connect(service)
+    conn.putrequest('POST', '/translate')
+    conn.putheader('Content-Length', length)
+    conn.endheaders()
+    response = conn.getresponse()
+    assert response.status == 400
+    assert response.getheader('Connection') == 'close'
+
+
+def test_provider_failure_is_502(service):
+    def fail(*args):
+        raise ConnectionError("provider down")
+
+    service.engine.translator.primary.translate = fail
+    status, body = post(connect(service), '/translate', {'text': 'Hello', 'source': 'en', 'target': 'de'})
+    assert status == 502
+    assert 'provider down' in body['error']
+
+
+def test_missing_backend_is_503(service):
+    service.engine._translator = None
+    status, _ = post(connect(service), '/translate', {'text': 'Hello', 'source': 'en', 'target': 'de'})
+    assert status == 503
+
+
+def test_metrics_count_requests(service):
+    conn = connect(service)
+    post(conn, '/translate', {'text': 'Hello', 'source': 'en', 'target': 'de'})
+    post(conn, '/translate', {'target': 'de'})
+    conn.request('GET', '/metrics')
+    stats = json.loads(conn.getresponse().read())
+    assert stats['endpoints']['translate']['requests'] == 2
+    assert stats['endpoints']['translate']['errors'] == 1
+
+
+def test_batch_lists_failed_items(service):
+    translate = service.engine.translator.primary.translate
+
+    def flaky(text, source_lang, target_lang):
+        if text == 'Goodbye':
+            raise ValueError("unsupported text")
+        return translate(text, source_lang, target_lang)
+
+    primary = service.engine.translator.primary
+    primary.translate = flaky
+    primary.translate_batch = lambda texts, source, target: [flaky(text, source, target) for text in texts]
+    service.save_history = True
+    status, body = post(connect(service), '/translate_batch',
+                        {'texts': ['Hello', 'Goodbye'], 'source': 'en', 'target': 'de'})
+    assert status == 200
+    assert body['translations'] == ['[de] Hello', None]
+    assert body['errors'] == [1]
+    service.engine.history.flush()
+    saved = [row['source_text'] for row in service.engine.history.search()[0]]
+    assert saved == ['Hello']
+
+
+def test_batch_failing_entirely_is_502(service):
+    def fail(*args):
+        raise ConnectionError("provider down")
+
+    service.engine.translator.primary.translate = fail
+    service.engine.translator.primary.translate_batch = fail
+    status, body = post(connect(service), '/translate_batch',
+                        {'texts': ['Hello', 'Goodbye'], 'source': 'en', 'target': 'de'})
+    assert status == 502
+    assert 'provider down' in body['error']
@@ -0,0 +1,103 @@
+import threading
+
+from translator_core.workers import RequestSequencer, WorkerPool
+
+
+def blocked_pool(max_queue=2):
+    """A pool whose only worker is stuck until the returned event is set"""
+    gate = threading.Event()
+    started = threading.Event()
+    pool = WorkerPool(max_workers=1, max_queue=max_queue)
+
+    def block():
+        started.set()
+        gate.wait(5)
+
+    pool.submit(block)
+    assert started.wait(5)
+    return pool, gate
+
+
+def test_keyed_submit_supersedes_queued_job():
+    pool, gate = blocked_pool()
+    results = []
+    try:
+        first = pool.submit(results.append, 'first', key='translate')
+        second = pool.submit(results.append, 'second', key='translate')
+        assert first.cancelled and not second.cancelled
+        assert pool.queued() == 1
+        gate.set()
+        second.wait(5)
+        assert results == ['second']
+        assert pool.stats['superseded'] == 1
+    finally:
+        gate.set()
+        pool.shutdown(wait=True)
+
+
+def test_full_queue_rejects_without_cancelling_previous_job():
+    pool, gate = blocked_pool(max_queue=2)
+    try:
+        keyed = pool.submit(lambda: 'kept', key='a')
+        pool.submit(lambda: None)
+        assert pool.submit(lambda: 'other', key='b') is None
+        assert pool.stats['rejected'] == 1
+        assert not keyed.cancelled and pool.is_current(keyed)
+
+        # Replacing a queued job needs no extra slot
+        replacement = pool.submit(lambda: 'new', key='a')
+        assert replacement is not None and keyed.cancelled
+        gate.set()
+        assert replacement.wait(5) == 'new'
+    finally:
+        gate.set()
+        pool.shutdown(wait=True)
+
+
+def test_provider_limit_caps_running_jobs():
+    pool = WorkerPool(max_workers=4, max_queue=16, provider_limits={'tts': 1})
+    lock = threading.Lock()
+    running = {'now': 0, 'peak': 0}
+    release = threading.Event()
+
+    def work():
+        with lock:
+            running['now'] += 1
+            running['peak'] = max(running['peak'], running['now'])
+        release.wait(0.05)
+        with lock:
+            running['now'] -= 1
+
+    try:
+        jobs = [pool.submit(work, provider='tts') for _ in range(4)]
+        for job in jobs:
+            job.done.wait(5)
+        assert running['peak'] == 1
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_errors_reach_error_callback():
+    pool = WorkerPool(max_workers=1)
+    errors = []
+    done = threading.Event()
+
+    def fail():
+        raise ValueError("boom")
+
+    try:
+        pool.submit(fail, error_callback=lambda e: (errors.append(e), done.set()))
+        assert done.wait(5)
+        assert isinstance(errors[0], ValueError)
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_sequencer_only_latest_is_current():
+    sequencer = RequestSequencer()
+    first = sequencer.next('translate')
+    second = sequencer.next('translate')
+    assert not sequencer.is_current('translate', first)
+    assert sequencer.is_current('translate', second)
+    sequencer.invalidate('translate')
+    assert not sequencer.is_current('translate', second)
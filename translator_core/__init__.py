@@ -0,0 +1,91 @@
+"""Core services shared by the Universal Translator widget"""
+
+from .aio import AsyncHTTPClient, AsyncTranslator, AsyncTranslatorEngine, HTTPError, LoopThread
+from .audio import AudioCache, ClipMemory, make_audio_key
+from .backends import (BACKENDS, GoogleTransBackend, HTTPBackend, OfflineBackend,
+                       TranslationBackend, chunk_texts, create_backend)
+from .cache import TranslationCache, make_cache_key, normalize_text
+from .clipboard import (ClipboardWatcher, FakeClipboard, FakeClipboardWatcher,
+                        PollingClipboardWatcher, Win32ClipboardWatcher,
+                        X11ClipboardWatcher, create_clipboard_watcher)
+from .detection import LanguageDetector, classify_script
+from .engine import LANGUAGES, TranslatorEngine
+from .history import HistoryStore, RetentionPolicy
+from .incremental import AdaptiveDebounce, IncrementalTranslator
+from .memory import DegradedTranslation, TranslationMemory, edit_distance
+from .playback import AudioController, FakePlayer, PygamePlayer, Utterance
+from .resilience import (BackendGuard, CircuitBreaker, CircuitOpenError, RateLimitedError,
+                         ResilienceError, ResilientBackend, TokenBucket, is_provider_failure)
+from .service import Coalescer, ServiceMetrics, TranslationService
+from .speech import (SYNTHESIZERS, GTTSSynthesizer, Synthesizer, ToneSynthesizer,
+                     create_synthesizer, split_speech, stream_chunks)
+from .startup import StartupTimer
+from .transfer import export_history, import_history
+from .workers import Job, RequestSequencer, WorkerPool
+
+__all__ = [
+    'AdaptiveDebounce',
+    'AsyncHTTPClient',
+    'AsyncTranslator',
+    'AsyncTranslatorEngine',
+    'AudioCache',
+    'AudioController',
+    'BACKENDS',
+    'BackendGuard',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'ClipMemory',
+    'Coalescer',
+    'ClipboardWatcher',
+    'DegradedTranslation',
+    'FakeClipboard',
+    'FakeClipboardWatcher',
+    'FakePlayer',
+    'GTTSSynthesizer',
+    'LANGUAGES',
+    'GoogleTransBackend',
+    'HTTPBackend',
+    'HTTPError',
+    'HistoryStore',
+    'IncrementalTranslator',
+    'Job',
+    'LanguageDetector',
+    'LoopThread',
+    'OfflineBackend',
+    'PollingClipboardWatcher',
+    'PygamePlayer',
+    'RateLimitedError',
+    'RequestSequencer',
+    'ResilienceError',
+    'ResilientBackend',
+    'RetentionPolicy',
+    'SYNTHESIZERS',
+    'ServiceMetrics',
+    'StartupTimer',
+    'Synthesizer',
+    'ToneSynthesizer',
+    'TokenBucket',
+    'TranslationBackend',
+    'TranslationCache',
+    'TranslationMemory',
+    'TranslationService',
+    'TranslatorEngine',
+    'Utterance',
+    'Win32ClipboardWatcher',
+    'WorkerPool',
+    'X11ClipboardWatcher',
+    'chunk_texts',
+    'classify_script',
+    'create_backend',
+    'create_clipboard_watcher',
+    'create_synthesizer',
+    'edit_distance',
+    'export_history',
+    'import_history',
+    'is_provider_failure',
+    'make_audio_key',
+    'make_cache_key',
+    'normalize_text',
+    'split_speech',
+    'stream_chunks',
+]
@@ -0,0 +1,395 @@
+import asyncio
+import json
+import random
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+# Worth retrying: the provider was busy or briefly unavailable
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class HTTPError(Exception):
+    """The provider answered with an error status"""
+
+    def __init__(self, status, body=None):
+        super().__init__(f"HTTP {status}: {body}" if body else f"HTTP {status}")
+        self.status = status
+        self.body = body
+
+
+def retry_delay(attempt, backoff=0.2, max_backoff=5.0):
+    """Full-jitter exponential backoff: a random delay up to backoff * 2**attempt"""
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+class ConnectionPool:
+    """HTTP/1.1 keep-alive connections over asyncio streams, used when httpx is not installed
+
+    Connections are kept per origin and reused, at most max_connections
+    are open at once. A pool belongs to the event loop it is first used on.
+    """
+
+    def __init__(self, max_connections=100, timeout=10.0):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle = {}
+        self._slots = None
+        self.stats = {'requests': 0, 'connections': 0, 'reused': 0}
+
+    async def request(self, method, url, body=b'', headers=None):
+        """Send one request and return (status, body bytes)"""
+        parts = urlsplit(url)
+        secure = parts.scheme == 'https'
+        origin = (parts.hostname, parts.port or (443 if secure else 80), secure)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {parts.netloc}",
+                 f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        async with self._slots:
+            self.stats['requests'] += 1
+            while True:
+                connection, reused = await self._acquire(origin)
+                try:
+                    status, data, keep_alive = await asyncio.wait_for(
+                        self._exchange(connection, request), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    connection[1].close()
+                    # The server dropped an idle connection, try again on a fresh one
+                    if reused:
+                        continue
+                    raise ConnectionError(str(e) or "connection closed") from e
+                except BaseException:
+                    connection[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.setdefault(origin, deque()).append(connection)
+                else:
+                    connection[1].close()
+                return status, data
+
+    async def _acquire(self, origin):
+        idle = self._idle.get(origin)
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                self.stats['reused'] += 1
+                return (reader, writer), True
+            writer.close()
+        host, port, secure = origin
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=secure or None), self.timeout)
+        self.stats['connections'] += 1
+        return (reader, writer), False
+
+    async def _exchange(self, connection, request):
+        reader, writer = connection
+        writer.write(request)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b''.join(chunks)
+        elif 'content-length' in headers:
+            data = await reader.readexactly(int(headers['content-length']))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return status, data, keep_alive
+
+    async def aclose(self):
+        """Close every idle connection"""
+        for idle in self._idle.values():
+            while idle:
+                idle.pop()[1].close()
+
+
+class AsyncHTTPClient:
+    """Shared pooled HTTP client for provider requests
+
+    Uses httpx (HTTP/2 when the h2 package is installed) if available,
+    otherwise the asyncio ConnectionPool. Transport failures surface as
+    ConnectionError and timeouts as asyncio.TimeoutError either way.
+    """
+
+    def __init__(self, max_connections=100, timeout=10.0, http2=True):
+        self.timeout = timeout
+        self.http2 = False
+        self._httpx = None
+        try:
+            import httpx
+        except ImportError:
+            httpx = None
+
+        if httpx is None:
+            self.transport = 'asyncio'
+            self._client = ConnectionPool(max_connections=max_connections, timeout=timeout)
+            return
+
+        self._httpx = httpx
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        try:
+            self._client = httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout)
+            self.http2 = http2
+        except ImportError:
+            # http2=True needs the h2 package
+            self._client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self.transport = 'httpx'
+
+    async def post_json(self, url, payload, headers=None):
+        """POST payload as JSON and return (status, decoded JSON or text)"""
+        body = json.dumps(payload).encode('utf-8')
+        headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        if self._httpx is None:
+            status, data = await self._client.request('POST', url, body, headers)
+        else:
+            try:
+                response = await self._client.post(url, content=body, headers=headers)
+            except self._httpx.TimeoutException as e:
+                raise asyncio.TimeoutError(str(e)) from e
+            except self._httpx.TransportError as e:
+                raise ConnectionError(str(e)) from e
+            status, data = response.status_code, response.content
+
+        try:
+            return status, json.loads(data)
+        except ValueError:
+            return status, data.decode('utf-8', 'replace')
+
+    @property
+    def stats(self):
+        if self._httpx is None:
+            return dict(self._client.stats, transport=self.transport)
+        return {'transport': self.transport, 'http2': self.http2}
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class AsyncTranslator:
+    """LibreTranslate-compatible provider over a shared AsyncHTTPClient
+
+    At most `concurrency` requests are in flight. Connection errors,
+    timeouts and busy responses (429, 5xx) are retried up to `retries`
+    times with full-jitter exponential backoff, other errors are raised.
+    """
+
+    name = 'http'
+
+    def __init__(self, base_url, client=None, concurrency=64, timeout=10.0, retries=3,
+                 backoff=0.2, max_backoff=5.0, api_key=None, http2=True):
+        self.base_url = base_url.rstrip('/')
+        self.client = client or AsyncHTTPClient(max_connections=concurrency, timeout=timeout, http2=http2)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.api_key = api_key
+        self._slots = None
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    async def _call(self, path, payload):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        if self.api_key:
+            payload = dict(payload, api_key=self.api_key)
+
+        for attempt in range(self.retries + 1):
+            try:
+                # The slot is only held for the request itself, not during backoff
+                async with self._slots:
+                    self.stats['requests'] += 1
+                    status, data = await asyncio.wait_for(
+                        self.client.post_json(self.base_url + path, payload), self.timeout)
+            except (ConnectionError, OSError, asyncio.TimeoutError) as e:
+                error = e
+            else:
+                if status < 400:
+                    return data
+                message = data.get('error') if isinstance(data, dict) else data
+                error = HTTPError(status, message)
+                if status not in TRANSIENT_STATUS:
+                    self.stats['failures'] += 1
+                    raise error
+
+            if attempt == self.retries:
+                self.stats['failures'] += 1
+                raise error
+            self.stats['retries'] += 1
+            await asyncio.sleep(retry_delay(attempt, self.backoff, self.max_backoff))
+
+    async def translate(self, text, source_lang, target_lang):
+        data = await self._call('/translate', {
+            'q': text, 'source': source_lang or 'auto', 'target': target_lang, 'format': 'text'})
+        return data['translatedText']
+
+    async def translate_batch(self, texts, source_lang, target_lang):
+        if not texts:
+            return []
+        data = await self._call('/translate', {
+            'q': list(texts), 'source': source_lang or 'auto', 'target': target_lang, 'format': 'text'})
+        return list(data['translatedText'])
+
+    async def translate_many(self, texts, source_lang, target_lang):
+        """Translate each text in its own request, all concurrently"""
+        return await asyncio.gather(*(self.translate(text, source_lang, target_lang) for text in texts))
+
+    async def detect(self, text):
+        data = await self._call('/detect', {'q': text})
+        return data[0]['language'] if data else 'en'
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class LoopThread:
+    """An asyncio event loop running in a daemon thread
+
+    Lets threaded code (the Tk widget, the worker pool, the CLI pipeline)
+    share one loop and one connection pool.
+    """
+
+    def __init__(self, name='asyncio-loop'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, callback=None, root=None):
+        """Schedule coro on the loop and return a concurrent.futures.Future
+
+        callback(result) is called when it finishes, or callback(exception)
+        if it raised. With root given, it runs on the Tk thread via root.after.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if callback is not None:
+            def done(finished):
+                if finished.cancelled():
+                    return
+                error = finished.exception()
+                result = error if error is not None else finished.result()
+                if root is None:
+                    callback(result)
+                else:
+                    try:
+                        root.after(0, callback, result)
+                    except RuntimeError:
+                        # The window was closed meanwhile
+                        pass
+
+            future.add_done_callback(done)
+        return future
+
+    def run(self, coro, timeout=None):
+        """Run coro on the loop and wait for its result from another thread"""
+        return self.submit(coro).result(timeout)
+
+    def close(self):
+        """Stop the loop and its thread"""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+
+class AsyncTranslatorEngine:
+    """Asyncio front end to a TranslatorEngine
+
+    Shares the engine's translation cache and memory. Backends with an
+    async provider (the http backend) are awaited directly on the shared
+    loop, so hundreds of translations can be in flight without a thread
+    each; other backends run in the loop's default executor.
+    """
+
+    def __init__(self, engine, loop_thread=None):
+        self.engine = engine
+        backend = engine.translator
+        self.provider = getattr(backend, 'provider', None)
+        self.loop_thread = loop_thread or getattr(backend, 'loop_thread', None) or LoopThread()
+        self._owns_loop = loop_thread is None and getattr(backend, 'loop_thread', None) is None
+
+    async def translate_text(self, text, source_lang, target_lang):
+        """Translate text, serving it from the cache or translation memory when possible"""
+        if not text.strip():
+            return ""
+        engine = self.engine
+        loop = asyncio.get_running_loop()
+        # SQLite reads and the memory's edit distance scan would stall every other request on the loop
+        cached = await loop.run_in_executor(None, self._lookup, text, source_lang, target_lang)
+        if cached is not None:
+            return cached
+
+        backend = engine.translator
+        if backend is None:
+            return "Translation service not available"
+        try:
+            if hasattr(backend, 'call_async'):
+                # Rate limited, circuit broken and hedged like the synchronous path
+                translated = await backend.call_async('translate', text, source_lang, target_lang)
+            elif self.provider is not None:
+                translated = await self.provider.translate(text, source_lang, target_lang)
+            else:
+                translated = await loop.run_in_executor(None, backend.translate, text, source_lang, target_lang)
+        except Exception as e:
+            print(f"Translation error: {e}")
+            fallback = await loop.run_in_executor(None, engine._serve_degraded, text, source_lang, target_lang)
+            if fallback is not None:
+                return fallback
+            return f"Translation error: {str(e)}"
+        await loop.run_in_executor(None, engine.translation_cache.put, text, source_lang, target_lang, translated)
+        return translated
+
+    def _lookup(self, text, source_lang, target_lang):
+        cached = self.engine.translation_cache.get(text, source_lang, target_lang)
+        if cached is None:
+            cached = self.engine._serve_from_memory(text, source_lang, target_lang)
+        return cached
+
+    async def translate_many(self, texts, source_lang, target_lang):
+        """Translate texts concurrently, identical texts are requested once"""
+        unique = list(dict.fromkeys(texts))
+        translated = await asyncio.gather(*(self.translate_text(text, source_lang, target_lang)
+                                            for text in unique))
+        results = dict(zip(unique, translated))
+        return [results[text] for text in texts]
+
+    def submit(self, text, source_lang, target_lang, callback=None, root=None):
+        """Translate on the shared loop from any thread, see LoopThread.submit"""
+        return self.loop_thread.submit(self.translate_text(text, source_lang, target_lang), callback, root)
+
+    def close(self):
+        if self._owns_loop:
+            self.loop_thread.close()
@@ -0,0 +1,200 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .cache import normalize_text
+
+
+def make_audio_key(text, language, voice='default'):
+    """Content address of a clip: hash of voice, language and normalized text"""
+    raw = f"{voice}\x1f{language}\x1f{normalize_text(text)}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ClipMemory:
+    """Thread-safe LRU of encoded clips held in memory, bounded by total bytes"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._clips = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, key):
+        """Return the clip bytes or None"""
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is not None:
+                self._clips.move_to_end(key)
+                self.hits += 1
+            return clip
+
+    def put(self, key, clip):
+        """Store clip bytes, evicting the least recently used clips"""
+        if len(clip) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._clips.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._clips[key] = clip
+            self._bytes += len(clip)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._clips.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self):
+        """Drop all clips"""
+        with self._lock:
+            self._clips.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._clips)
+
+
+class AudioCache:
+    """On-disk cache of synthesized clips with an in-memory LRU index and a size cap
+
+    Clips are stored as <key>.mp3 in cache_dir. The index is rebuilt from the
+    directory at startup, oldest modification time first, and a hit touches
+    the file so the order survives restarts.
+    """
+
+    def __init__(self, cache_dir, max_bytes=100 * 1024 * 1024, suffix='.mp3'):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._index = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.load_index()
+
+    def load_index(self):
+        """Rebuild the index from the files in cache_dir"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.tmp'):
+                # Left behind by an interrupted write
+                self._unlink(path)
+                continue
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, name[:-len(self.suffix)], info.st_size))
+
+        with self._lock:
+            self._index.clear()
+            self._bytes = 0
+            for _, key, size in sorted(entries):
+                self._index[key] = size
+                self._bytes += size
+            self._evict()
+
+    def path_for(self, key):
+        """File path of the clip with this key"""
+        return os.path.join(self.cache_dir, key + self.suffix)
+
+    def get(self, text, language, voice='default'):
+        """Return the path of a cached clip or None"""
+        key = make_audio_key(text, language, voice)
+        with self._lock:
+            if key not in self._index:
+                self._stats['misses'] += 1
+                return None
+            self._index.move_to_end(key)
+            self._stats['hits'] += 1
+
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            # Removed behind our back
+            with self._lock:
+                self._bytes -= self._index.pop(key, 0)
+            return None
+        return path
+
+    def read(self, text, language, voice='default'):
+        """Return the bytes of a cached clip or None"""
+        path = self.get(text, language, voice)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, text, language, data, voice='default'):
+        """Store clip bytes, returning the cached path"""
+        key = make_audio_key(text, language, voice)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return self._commit(key, tmp_path)
+
+    def _commit(self, key, tmp_path):
+        path = self.path_for(key)
+        size = os.path.getsize(tmp_path)
+        # Atomic rename, readers never see a partial clip
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._stats['stores'] += 1
+            self._evict(keep=key)
+        return path
+
+    def _evict(self, keep=None):
+        # Caller holds the lock
+        while self._bytes > self.max_bytes and len(self._index) > (1 if keep else 0):
+            key, size = self._index.popitem(last=False)
+            if key == keep:
+                self._index[key] = size
+                continue
+            self._bytes -= size
+            self._stats['evictions'] += 1
+            self._unlink(self.path_for(key))
+
+    def _unlink(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            # Still open for playback on Windows, the next startup scan retries
+            pass
+
+    def clear(self):
+        """Delete every cached clip"""
+        with self._lock:
+            for key in list(self._index):
+                self._unlink(self.path_for(key))
+            self._index.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and the size of the cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._index)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def __len__(self):
+        return len(self._index)
@@ -0,0 +1,227 @@
+import json
+import re
+import time
+
+
+def chunk_texts(texts, max_items=50, max_chars=None):
+    """Group texts into consecutive batches bounded by item count and size"""
+    batch, batch_chars = [], 0
+    for text in texts:
+        too_long = max_chars and batch and batch_chars + len(text) > max_chars
+        if len(batch) >= max_items or too_long:
+            yield batch
+            batch, batch_chars = [], 0
+        batch.append(text)
+        batch_chars += len(text)
+    if batch:
+        yield batch
+
+
+class TranslationBackend:
+    """Base class for translation providers"""
+
+    name = 'base'
+    max_batch_items = 1
+    max_batch_chars = None
+    # Requests per second the provider tolerates, None for no limit
+    rate_limit = None
+
+    def translate(self, text, source_lang, target_lang):
+        """Translate a single string, 'auto' means detect the source language"""
+        raise NotImplementedError
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        """Translate several strings in one provider request, preserving order"""
+        return [self.translate(text, source_lang, target_lang) for text in texts]
+
+    def detect(self, text):
+        """Return the language code of text"""
+        raise NotImplementedError
+
+    def capabilities(self):
+        """Describe what this backend supports"""
+        return {
+            'name': self.name,
+            'batch': False,
+            'detect': False,
+            'offline': False,
+            'max_batch_items': self.max_batch_items,
+            'max_batch_chars': self.max_batch_chars,
+        }
+
+
+class GoogleTransBackend(TranslationBackend):
+    """Google Translate through the googletrans package"""
+
+    name = 'googletrans'
+    # googletrans 4.0.0rc1 translates one string per request, a list is not split
+    # into segments, so batches are one item and each segment is its own call
+    max_batch_items = 1
+    # The unofficial web endpoint starts throttling well before this
+    rate_limit = 5.0
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate(self, text, source_lang, target_lang):
+        src = None if source_lang in (None, 'auto') else source_lang
+        if src is None:
+            return self.translator.translate(text, dest=target_lang).text
+        return self.translator.translate(text, src=src, dest=target_lang).text
+
+    def detect(self, text):
+        return self.translator.detect(text).lang
+
+    def capabilities(self):
+        return {
+            'name': self.name,
+            'batch': False,
+            'detect': True,
+            'offline': False,
+            'max_batch_items': self.max_batch_items,
+            'max_batch_chars': self.max_batch_chars,
+        }
+
+
+class OfflineBackend(TranslationBackend):
+    """Deterministic in-process engine for benchmarks and air-gapped machines
+
+    Phrases found in the dictionary are translated as a whole, otherwise
+    known words are substituted one by one and the rest is echoed back
+    with a target language marker.
+    """
+
+    name = 'offline'
+    max_batch_items = 500
+
+    WORD_PATTERN = re.compile(r"\w+|\W+", re.UNICODE)
+
+    def __init__(self, dictionary=None, dictionary_path=None, latency=0.0):
+        # dictionary maps "src-dest" pairs to {source phrase: translation}
+        self.dictionary = {}
+        if dictionary_path:
+            with open(dictionary_path, encoding='utf-8') as f:
+                self.load_dictionary(json.load(f))
+        if dictionary:
+            self.load_dictionary(dictionary)
+        self.latency = latency
+
+    def load_dictionary(self, dictionary):
+        """Merge phrase tables into the engine"""
+        for pair, phrases in dictionary.items():
+            table = self.dictionary.setdefault(pair, {})
+            for source, target in phrases.items():
+                table[source.lower()] = target
+
+    def translate(self, text, source_lang, target_lang):
+        if self.latency:
+            time.sleep(self.latency)
+
+        if source_lang in (None, 'auto'):
+            source_lang = self.detect(text)
+        if source_lang == target_lang:
+            return text
+
+        table = self.dictionary.get(f"{source_lang}-{target_lang}", {})
+        phrase = table.get(text.strip().lower())
+        if phrase is not None:
+            return phrase
+
+        translated = []
+        substituted = False
+        for token in self.WORD_PATTERN.findall(text):
+            word = table.get(token.lower())
+            if word is not None:
+                translated.append(word)
+                substituted = True
+            else:
+                translated.append(token)
+
+        if substituted:
+            return ''.join(translated)
+        return f"[{target_lang}] {text}"
+
+    def detect(self, text):
+        words = [token.lower() for token in self.WORD_PATTERN.findall(text) if token.strip()]
+        best_lang, best_hits = 'en', 0
+        for pair, table in self.dictionary.items():
+            hits = sum(1 for word in words if word in table)
+            if hits > best_hits:
+                best_lang, best_hits = pair.split('-', 1)[0], hits
+        return best_lang
+
+    def capabilities(self):
+        return {
+            'name': self.name,
+            'batch': True,
+            'detect': True,
+            'offline': True,
+            'max_batch_items': self.max_batch_items,
+            'max_batch_chars': self.max_batch_chars,
+        }
+
+
+class HTTPBackend(TranslationBackend):
+    """LibreTranslate-compatible HTTP service over a pooled asyncio client
+
+    All calls share one event loop thread and one connection pool, so the
+    worker threads calling translate() reuse keep-alive connections. The
+    async provider is exposed for AsyncTranslatorEngine.
+    """
+
+    name = 'http'
+    max_batch_items = 100
+    max_batch_chars = 20000
+
+    def __init__(self, base_url='http://127.0.0.1:5000', api_key=None, concurrency=64,
+                 timeout=10.0, retries=3, backoff=0.2, http2=True):
+        from .aio import AsyncTranslator, LoopThread
+
+        self.loop_thread = LoopThread(name='http-backend')
+        self.provider = AsyncTranslator(base_url, concurrency=concurrency, timeout=timeout,
+                                        retries=retries, backoff=backoff, api_key=api_key, http2=http2)
+
+    def translate(self, text, source_lang, target_lang):
+        return self.loop_thread.run(self.provider.translate(text, source_lang, target_lang))
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        return self.loop_thread.run(self.provider.translate_batch(texts, source_lang, target_lang))
+
+    def detect(self, text):
+        return self.loop_thread.run(self.provider.detect(text))
+
+    def capabilities(self):
+        return {
+            'name': self.name,
+            'batch': True,
+            'detect': True,
+            'offline': False,
+            'max_batch_items': self.max_batch_items,
+            'max_batch_chars': self.max_batch_chars,
+        }
+
+    def close(self):
+        """Close pooled connections and stop the loop thread"""
+        try:
+            self.loop_thread.run(self.provider.aclose(), timeout=1)
+        except Exception:
+            pass
+        self.loop_thread.close()
+
+
+BACKENDS = {
+    GoogleTransBackend.name: GoogleTransBackend,
+    HTTPBackend.name: HTTPBackend,
+    OfflineBackend.name: OfflineBackend,
+}
+
+
+def create_backend(name='googletrans', **options):
+    """Instantiate a registered backend by name"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown translation backend: {name} "
+                         f"(available: {', '.join(sorted(BACKENDS))})")
+    return backend_class(**options)
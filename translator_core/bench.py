@@ -0,0 +1,319 @@
+"""Reproducible benchmarks of the engine's hot paths
+
+    python -m translator_core.bench --save before.json
+    python -m translator_core.bench --compare before.json
+
+Every run uses a fresh temporary data directory, the offline backend as
+a stub translation provider and the tone synthesizer as a fake TTS
+service, so numbers depend on this code and the machine only.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from .engine import TranslatorEngine
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog meeting tomorrow morning please send report "
+    "invoice attached thanks again hello world message price order shipping delivery "
+    "customer support account password update schedule weekend family dinner train station"
+).split()
+
+SHORT_TEXTS = [
+    "Hello", "Thank you", "Good morning", "ok", "Hola, ¿cómo estás?", "Bonjour à tous",
+    "Guten Tag", "Grazie mille", "Obrigado", "Привет", "Спасибо большое", "こんにちは",
+    "ありがとうございます", "안녕하세요", "你好", "谢谢你", "مرحبا", "नमस्ते", "Γειά σου", "שלום",
+]
+
+LONG_TEXTS = [
+    "The meeting has been moved to Thursday afternoon because several members of the team "
+    "are travelling on Wednesday. Please update your calendars and let me know if the new "
+    "time does not work for you.",
+    "El pedido llegará la próxima semana. Si tiene alguna pregunta sobre la factura o el envío, "
+    "no dude en ponerse en contacto con nuestro servicio de atención al cliente.",
+    "Nous avons bien reçu votre message et nous vous répondrons dans les plus brefs délais. "
+    "Merci de votre patience et de votre confiance.",
+    "Die Lieferung verzögert sich leider um einige Tage, da unser Lager derzeit umgebaut wird. "
+    "Wir bitten um Ihr Verständnis.",
+    "Il treno per Milano parte alle otto e mezza dal binario tre. Ricordati di convalidare il "
+    "biglietto prima di salire.",
+    "Заказ был отправлен сегодня утром. Номер для отслеживания посылки придёт вам на почту "
+    "в течение нескольких часов.",
+    "会議は来週の月曜日に延期されました。資料は金曜日までに共有してください。よろしくお願いします。",
+    "我们已经收到您的付款，订单将在两个工作日内发货。如有任何问题，请随时联系我们。",
+]
+
+# Quick runs are for smoke checks, compare full runs with full runs
+SIZES = {
+    'full': {'translate': 2000, 'detect': 2000, 'save': 20000, 'search': 300, 'tts': 300},
+    'quick': {'translate': 200, 'detect': 200, 'save': 2000, 'search': 50, 'tts': 50},
+}
+
+
+def make_sentences(count, seed, min_words=3, max_words=12):
+    """Deterministic pseudo-random sentences"""
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))).capitalize() + '.'
+            for _ in range(count)]
+
+
+def summarize(samples, elapsed):
+    """Latency percentiles in milliseconds and throughput for per-call samples in seconds"""
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'n': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 4),
+        'p50_ms': round(pct(50), 4),
+        'p95_ms': round(pct(95), 4),
+        'p99_ms': round(pct(99), 4),
+        'max_ms': round(ordered[-1] * 1000, 4),
+        'ops_per_s': round(len(ordered) / elapsed, 1) if elapsed else None,
+    }
+
+
+def measure(fn, items, setup=None):
+    """Call fn(item) for every item, timing each call; setup() runs untimed before each"""
+    samples = []
+    setup_time = 0.0
+    started = time.perf_counter()
+    for item in items:
+        if setup is not None:
+            begin = time.perf_counter()
+            setup()
+            setup_time += time.perf_counter() - begin
+        begin = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - begin)
+    return summarize(samples, time.perf_counter() - started - setup_time)
+
+
+def bench_translate(engine, size, seed):
+    texts = make_sentences(size, seed)
+    return {
+        # Every text is new: cache lookups miss and the stub backend is called
+        'translate_text.miss': measure(lambda text: engine.translate_text(text, 'en', 'es'), texts),
+        'translate_text.hit': measure(lambda text: engine.translate_text(text, 'en', 'es'), texts),
+    }
+
+
+def bench_detect(engine, size, seed):
+    rng = random.Random(seed)
+    short = [rng.choice(SHORT_TEXTS) for _ in range(size)]
+    long = [rng.choice(LONG_TEXTS) for _ in range(size)]
+    detector = engine.detector
+    detector.warm_up(background=False)
+    return {
+        'detect_language.short': measure(engine.detect_language, short, setup=detector.cache.clear),
+        'detect_language.long': measure(engine.detect_language, long, setup=detector.cache.clear),
+        'detect_language.cached': measure(engine.detect_language, short),
+    }
+
+
+def bench_history(engine, size, search_size, seed):
+    sources = make_sentences(size, seed)
+    translations = [f"[es] {text}" for text in sources]
+    results = {}
+
+    # Throughput includes the background writer committing every row
+    samples = []
+    started = time.perf_counter()
+    for source, translated in zip(sources, translations):
+        begin = time.perf_counter()
+        engine.save_translation(source, translated, 'en', 'es')
+        samples.append(time.perf_counter() - begin)
+    engine.history.flush()
+    results['save_translation'] = summarize(samples, time.perf_counter() - started)
+
+    rng = random.Random(seed)
+    terms = [rng.choice(WORDS) for _ in range(search_size)]
+    results['search_history.recent'] = measure(lambda _: engine.search_history(limit=50), terms)
+    results['search_history.fts'] = measure(lambda term: engine.search_history(term, limit=50), terms)
+    results['search_history.filtered'] = measure(
+        lambda term: engine.search_history(term, source_lang='en', target_lang='es', limit=50), terms)
+
+    def deep_page(_):
+        rows, cursor = engine.search_history(limit=50)
+        for _ in range(9):
+            if cursor is None:
+                break
+            rows, cursor = engine.search_history(before=cursor, limit=50)
+
+    results['search_history.page10'] = measure(deep_page, terms[:max(1, search_size // 5)])
+    return results
+
+
+def bench_tts(engine, size, seed):
+    texts = make_sentences(size, seed + 1, 2, 8)
+    return {
+        'text_to_speech.miss': measure(lambda text: engine.text_to_speech(text, 'en'), texts),
+        'text_to_speech.hit': measure(lambda text: engine.text_to_speech(text, 'en'), texts),
+        # Evicted from memory, read back from the disk cache
+        'synthesize_audio.disk': measure(lambda text: engine.synthesize_audio(text, 'en'), texts,
+                                         setup=engine.audio_clips.clear),
+    }
+
+
+BENCHMARKS = ('translate', 'detect', 'history', 'tts')
+
+
+def run(names=BENCHMARKS, quick=False, seed=1234, backend_latency=0.0, tts_latency=0.0):
+    """Run the selected benchmark groups, each on a fresh engine, and return the results"""
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark '{unknown[0]}', expected one of: {', '.join(BENCHMARKS)}")
+
+    sizes = SIZES['quick' if quick else 'full']
+    results = {}
+    for name in names:
+        data_dir = tempfile.mkdtemp(prefix='translator-bench-')
+        engine = TranslatorEngine(backend='offline', backend_options={'latency': backend_latency},
+                                  data_dir=data_dir, synthesizer='tone',
+                                  synthesizer_options={'latency': tts_latency})
+        try:
+            if name == 'translate':
+                results.update(bench_translate(engine, sizes['translate'], seed))
+            elif name == 'detect':
+                results.update(bench_detect(engine, sizes['detect'], seed))
+            elif name == 'history':
+                results.update(bench_history(engine, sizes['save'], sizes['search'], seed))
+            elif name == 'tts':
+                results.update(bench_tts(engine, sizes['tts'], seed))
+        finally:
+            engine.close()
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    return {
+        'meta': environment(quick, seed, backend_latency, tts_latency),
+        'results': results,
+    }
+
+
+def environment(quick, seed, backend_latency, tts_latency):
+    """What the numbers were measured on, stored next to them"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    try:
+        import langdetect  # noqa: F401
+        langdetect_available = True
+    except ImportError:
+        langdetect_available = False
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': sqlite3.sqlite_version,
+        'langdetect': langdetect_available,
+        'quick': quick,
+        'seed': seed,
+        'backend_latency': backend_latency,
+        'tts_latency': tts_latency,
+    }
+
+
+def compare(current, baseline, threshold=0.15, noise_ms=0.02):
+    """Return (name, metric, before, after, change) for every metric that got worse than threshold
+
+    Latencies regress when they grow, throughput when it drops. Latency
+    changes smaller than noise_ms are ignored.
+    """
+    regressions = []
+    for name, stats in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            old, new = before.get(metric), stats.get(metric)
+            if old and new and new > old * (1 + threshold) and new - old > noise_ms:
+                regressions.append((name, metric, old, new, new / old - 1))
+        old, new = before.get('ops_per_s'), stats.get('ops_per_s')
+        if old and new and new < old * (1 - threshold):
+            regressions.append((name, 'ops_per_s', old, new, new / old - 1))
+    return regressions
+
+
+def format_results(current, baseline=None):
+    """Results as a text table, with the p50 change against baseline when given"""
+    header = f"{'benchmark':<28} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>11}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    lines = [header, '-' * len(header)]
+    for name, stats in current['results'].items():
+        line = (f"{name:<28} {stats['n']:>6} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+                f"{stats['p99_ms']:>9.3f} {stats['ops_per_s'] or 0:>11.1f}")
+        before = baseline['results'].get(name) if baseline else None
+        if before and before.get('p50_ms'):
+            line += f" {(stats['p50_ms'] / before['p50_ms'] - 1) * 100:>+11.1f}%"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m translator_core.bench',
+                                     description="Benchmark translation, detection, history and TTS paths")
+    parser.add_argument('--only', help=f"Comma-separated groups to run (default: {','.join(BENCHMARKS)})")
+    parser.add_argument('--quick', action='store_true', help="Fewer iterations, for a smoke check")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--backend-latency', type=float, default=0.0,
+                        help="Seconds the stub translation backend sleeps per call")
+    parser.add_argument('--tts-latency', type=float, default=0.0,
+                        help="Seconds the fake synthesizer sleeps per clip")
+    parser.add_argument('--save', metavar='PATH', help="Write results as JSON for later comparison")
+    parser.add_argument('--compare', metavar='PATH', help="Compare with results saved by an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Relative change counted as a regression (default: 0.15)")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Exit with status 1 when --compare finds a regression")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.only.split(',')] if args.only else list(BENCHMARKS)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    try:
+        current = run(names, args.quick, args.seed, args.backend_latency, args.tts_latency)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    print(format_results(current, baseline))
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    if baseline is None:
+        return 0
+    if baseline['meta'].get('quick') != current['meta']['quick']:
+        print("\nWarning: comparing a --quick run with a full run", file=sys.stderr)
+    regressions = compare(current, baseline, args.threshold)
+    if not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}")
+        return 0
+    print(f"\nRegressions beyond {args.threshold:.0%} against {args.compare}:")
+    for name, metric, old, new, change in regressions:
+        print(f"  {name} {metric}: {old} -> {new} ({change:+.1%})")
+    return 1 if args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
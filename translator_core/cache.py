@@ -0,0 +1,320 @@
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+SPACES_PATTERN = re.compile(r'[ \t]+')
+# Bumped whenever make_cache_key changes, stored keys of another version are dropped
+CACHE_KEY_VERSION = 2
+
+
+def normalize_text(text):
+    """Normalize text so trivially different inputs share a cache entry
+
+    Runs of spaces and tabs collapse, line breaks are kept: text laid out
+    on several lines translates differently than the same words on one.
+    """
+    text = unicodedata.normalize('NFC', text).replace('\r\n', '\n').replace('\r', '\n')
+    return '\n'.join(SPACES_PATTERN.sub(' ', line).strip() for line in text.strip().split('\n'))
+
+
+def make_cache_key(text, source_lang, target_lang):
+    """Build the lookup key for a (text, source, target) triple"""
+    raw = f"{source_lang or 'auto'}\x1f{target_lang}\x1f{normalize_text(text)}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def table_bytes(conn, tables):
+    """Bytes of the pages holding tables and their indexes, None if SQLite lacks dbstat"""
+    placeholders = ', '.join('?' * len(tables))
+    try:
+        row = conn.execute(f'''
+            SELECT COALESCE(SUM(s.pgsize), 0) FROM dbstat s
+            JOIN sqlite_master m ON m.name = s.name
+            WHERE m.tbl_name IN ({placeholders})
+        ''', tuple(tables)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0]
+
+
+class MemoryCache:
+    """Thread-safe LRU cache with size and age based eviction"""
+
+    def __init__(self, max_entries=2048, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return cached value or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, stored_at = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Store value, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TranslationCache:
+    """Two-tier translation cache: in-memory LRU backed by SQLite"""
+
+    def __init__(self, db_path, max_entries=2048, ttl=3600, touch_batch=256, touch_interval=30.0):
+        self.db_path = db_path
+        self.memory = MemoryCache(max_entries=max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+        # last_used of disk hits is written with the next put, or once enough pile up
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self._touched = {}
+        self._touched_since = 0.0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.init_table()
+
+    def init_table(self):
+        """Create the lookup table and seed it from existing history"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='translation_cache'")
+        is_new = cursor.fetchone() is None
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS translation_cache (
+                cache_key TEXT PRIMARY KEY,
+                translated_text TEXT NOT NULL,
+                source_lang TEXT,
+                target_lang TEXT,
+                created REAL,
+                last_used REAL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_translation_cache_last_used '
+                       'ON translation_cache (last_used)')
+        cursor.execute('CREATE TABLE IF NOT EXISTS translation_cache_meta (key_version INTEGER)')
+        row = cursor.execute('SELECT key_version FROM translation_cache_meta').fetchone()
+        stale = not is_new and (row is None or row[0] != CACHE_KEY_VERSION)
+        if stale:
+            # Keys built by an older make_cache_key could answer the wrong text
+            cursor.execute('DELETE FROM translation_cache')
+        cursor.execute('DELETE FROM translation_cache_meta')
+        cursor.execute('INSERT INTO translation_cache_meta (key_version) VALUES (?)', (CACHE_KEY_VERSION,))
+
+        self.conn.commit()
+        if is_new or stale:
+            # Existing history already holds translations worth reusing
+            self.seed_from_history()
+
+    def seed_from_history(self):
+        """Copy translations from the history table into the disk tier, returning the row count"""
+        with self._lock:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='translations'").fetchone()
+            if exists is None:
+                return 0
+            self.conn.create_function('cache_key', 3, make_cache_key, deterministic=True)
+            now = time.time()
+            cursor = self.conn.execute('''
+                INSERT OR REPLACE INTO translation_cache
+                    (cache_key, translated_text, source_lang, target_lang, created, last_used)
+                SELECT cache_key(source_text, source_lang, target_lang), translated_text,
+                       source_lang, target_lang, ?, ?
+                FROM translations
+                WHERE source_text IS NOT NULL AND translated_text IS NOT NULL
+                ORDER BY id
+            ''', (now, now))
+            self.conn.commit()
+        # Entries held in memory may predate what was just copied
+        self.memory.clear()
+        return cursor.rowcount
+
+    def get(self, text, source_lang, target_lang):
+        """Return a cached translation or None"""
+        key = make_cache_key(text, source_lang, target_lang)
+
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT translated_text FROM translation_cache WHERE cache_key = ?', (key,)
+            ).fetchone()
+            if row is not None:
+                now = time.time()
+                if not self._touched:
+                    self._touched_since = now
+                self._touched[key] = now
+                if len(self._touched) >= self.touch_batch or now - self._touched_since >= self.touch_interval:
+                    self._flush_touched()
+                    self.conn.commit()
+
+        if row is None:
+            self._count('misses')
+            return None
+
+        self.memory.put(key, row[0])
+        self._count('disk_hits')
+        return row[0]
+
+    def put(self, text, source_lang, target_lang, translated):
+        """Store a translation in both tiers"""
+        key = make_cache_key(text, source_lang, target_lang)
+        self.memory.put(key, translated)
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO translation_cache
+                    (cache_key, translated_text, source_lang, target_lang, created, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (key, translated, source_lang, target_lang, now, now))
+            self._flush_touched()
+            self.conn.commit()
+        self._count('stores')
+
+    def put_many(self, pairs, source_lang, target_lang):
+        """Store (text, translated) pairs in both tiers with one transaction"""
+        now = time.time()
+        rows = []
+        for text, translated in pairs:
+            key = make_cache_key(text, source_lang, target_lang)
+            self.memory.put(key, translated)
+            rows.append((key, translated, source_lang, target_lang, now, now))
+        if not rows:
+            return
+
+        with self._lock:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO translation_cache
+                    (cache_key, translated_text, source_lang, target_lang, created, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self._flush_touched()
+            self.conn.commit()
+            self._stats['stores'] += len(rows)
+
+    def flush(self):
+        """Write pending last_used updates of disk hits"""
+        with self._lock:
+            if self._touched:
+                self._flush_touched()
+                self.conn.commit()
+
+    def clear(self):
+        """Remove all cached translations"""
+        self.memory.clear()
+        with self._lock:
+            self._touched.clear()
+            self.conn.execute('DELETE FROM translation_cache')
+            self.conn.commit()
+
+    def prune(self, max_age_days=None, max_rows=None, max_bytes=None):
+        """Drop disk entries unused for max_age_days and the least recently used beyond max_rows or max_bytes"""
+        deleted = 0
+        with self._lock:
+            # Entries read recently must not look stale
+            self._flush_touched()
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                deleted += self.conn.execute('DELETE FROM translation_cache WHERE last_used < ?',
+                                             (cutoff,)).rowcount
+            if max_rows is not None:
+                deleted += self.conn.execute('''
+                    DELETE FROM translation_cache WHERE cache_key IN (
+                        SELECT cache_key FROM translation_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (max_rows,)).rowcount
+            self.conn.commit()
+
+            if max_bytes is not None:
+                used = self._size_bytes()
+                while used > max_bytes:
+                    rows = self.conn.execute('SELECT COUNT(*) FROM translation_cache').fetchone()[0]
+                    if not rows:
+                        break
+                    # Estimate from the average entry size, with some slack
+                    excess = math.ceil((used - max_bytes) / (used / rows) * 1.1)
+                    removed = self.conn.execute('''
+                        DELETE FROM translation_cache WHERE cache_key IN (
+                            SELECT cache_key FROM translation_cache ORDER BY last_used LIMIT ?
+                        )
+                    ''', (min(rows, max(excess, 1)),)).rowcount
+                    self.conn.commit()
+                    deleted += removed
+                    previous, used = used, self._size_bytes()
+                    # Partly filled pages can keep the size from dropping, deleting more would not help
+                    if not removed or used >= previous:
+                        break
+        return deleted
+
+    def size_bytes(self):
+        """Bytes used by the disk tier and its indexes"""
+        with self._lock:
+            return self._size_bytes()
+
+    def _size_bytes(self):
+        # Caller holds the lock
+        used = table_bytes(self.conn, ('translation_cache',))
+        if used is None:
+            # Without dbstat, estimate: the key is stored twice, plus the text and an index entry
+            used = self.conn.execute('''
+                SELECT COALESCE(SUM(LENGTH(CAST(translated_text AS BLOB)) + 150), 0) FROM translation_cache
+            ''').fetchone()[0]
+        return used
+
+    def stats(self):
+        """Return hit/miss counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        stats['memory_entries'] = len(self.memory)
+        return stats
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self._flush_touched()
+            self.conn.commit()
+            self.conn.close()
+
+    def _flush_touched(self):
+        # Caller holds the lock and commits
+        if self._touched:
+            self.conn.executemany('UPDATE translation_cache SET last_used = ? WHERE cache_key = ?',
+                                  [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
@@ -0,0 +1,178 @@
+import argparse
+import os
+import sys
+import time
+
+from .engine import TranslatorEngine
+from .pipeline import TranslationPipeline, read_chunks
+from .service import TranslationService
+from .transfer import FORMATS
+
+
+def open_inputs(paths):
+    """Yield readable text streams for the given files, or stdin when none are given"""
+    if not paths or paths == ['-']:
+        yield sys.stdin
+        return
+
+    for path in paths:
+        with open(path, encoding='utf-8', newline='') as f:
+            yield f
+
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(
+        prog='python -m translator_core',
+        description="Translate stdin or files without the widget, streaming in constant memory")
+    parser.add_argument('files', nargs='*', help="Input files (default: stdin)")
+    parser.add_argument('-f', '--from', dest='source_lang', default='auto',
+                        help="Source language code (default: auto)")
+    parser.add_argument('-t', '--to', dest='target_lang', default='en',
+                        help="Target language code (default: en)")
+    parser.add_argument('--backend', default=os.environ.get('TRANSLATOR_BACKEND', 'googletrans'),
+                        help="Translation backend: googletrans, http or offline")
+    parser.add_argument('--offline-dictionary', default=os.environ.get('TRANSLATOR_OFFLINE_DICT'),
+                        help="JSON phrase table for the offline backend")
+    parser.add_argument('--backend-url', default=os.environ.get('TRANSLATOR_URL', 'http://127.0.0.1:5000'),
+                        help="LibreTranslate-compatible service for the http backend")
+    parser.add_argument('--fallback-backend', default=os.environ.get('TRANSLATOR_FALLBACK'),
+                        help="Backend used while the primary is throttled or failing")
+    parser.add_argument('--hedge-after', type=float,
+                        help="Also ask the fallback backend when the primary takes longer than this many seconds")
+    parser.add_argument('--data-dir', default='translator_data',
+                        help="Directory holding history.db and the cache")
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help="Sentences per batched translation request")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Batches translated in parallel")
+    parser.add_argument('-o', '--output', help="Write translations to this file (default: stdout)")
+    parser.add_argument('--save-history', action='store_true',
+                        help="Record translations in the history database")
+    parser.add_argument('--memory-threshold', type=float,
+                        help="Serve translation memory matches scoring at least this (0-1) "
+                             "from history instead of the backend, 1 for exact matches only")
+    parser.add_argument('--export', metavar='PATH',
+                        help="Export the history database to a .jsonl, .csv or .parquet file "
+                             "(.gz allowed for text formats) and exit")
+    parser.add_argument('--import', dest='import_path', metavar='PATH',
+                        help="Bulk import an exported history file and exit")
+    parser.add_argument('--format', choices=FORMATS,
+                        help="File format for --export/--import (default: from the extension)")
+    parser.add_argument('--vacuum', action='store_true',
+                        help="Rewrite the history database once so maintenance can compact it "
+                             "incrementally, and exit (blocks other users of the database meanwhile)")
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help="Run as a local HTTP/JSON translation service on this port")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Interface for --serve (default: 127.0.0.1)")
+    parser.add_argument('--stats', action='store_true',
+                        help="Print cache statistics to stderr when done")
+    return parser
+
+
+def transfer_history(engine, args):
+    """Run --export or --import and close the engine"""
+    try:
+        start = time.perf_counter()
+        if args.import_path:
+            count = engine.import_history(args.import_path, args.format)
+            action = f"Imported {count} rows from {args.import_path}"
+        else:
+            count = engine.export_history(args.export, args.format)
+            action = f"Exported {count} rows to {args.export}"
+        print(f"{action} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        return 0
+    except (ImportError, ValueError, OSError) as e:
+        print(f"History transfer failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.close()
+
+
+def vacuum(engine):
+    """Run --vacuum and close the engine"""
+    try:
+        start = time.perf_counter()
+        if engine.history.enable_incremental_vacuum():
+            print(f"History database rewritten in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        else:
+            print("History database already uses incremental compaction", file=sys.stderr)
+        return 0
+    except Exception as e:
+        print(f"Vacuum failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.close()
+
+
+def serve(engine, args):
+    """Run the HTTP service until interrupted and close the engine"""
+    service = TranslationService(engine, args.host, args.serve, save_history=args.save_history)
+    engine.start_maintenance()
+    print(f"Translation service on http://{args.host}:{args.serve} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.stats:
+            print(f"Service stats: {service.stats()}", file=sys.stderr)
+        engine.close()
+    return 0
+
+
+def main(argv=None):
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+
+    backend_options = {}
+    if args.backend == 'offline' and args.offline_dictionary:
+        backend_options['dictionary_path'] = args.offline_dictionary
+    if args.backend == 'http':
+        backend_options['base_url'] = args.backend_url
+        backend_options['concurrency'] = max(args.concurrency, 8)
+
+    try:
+        engine = TranslatorEngine(backend=args.backend, backend_options=backend_options,
+                                  data_dir=args.data_dir, memory_threshold=args.memory_threshold,
+                                  fallback_backend=args.fallback_backend, hedge_after=args.hedge_after)
+    except ImportError as e:
+        print(f"Missing package for backend '{args.backend}': {e}", file=sys.stderr)
+        return 1
+    if args.export or args.import_path:
+        return transfer_history(engine, args)
+    if args.vacuum:
+        return vacuum(engine)
+    if args.memory_threshold is not None:
+        engine.load_memory(background=False)
+    if args.serve is not None:
+        return serve(engine, args)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    pipeline = None
+    try:
+        pipeline = TranslationPipeline(engine, args.source_lang, args.target_lang,
+                                       batch_size=args.batch_size,
+                                       concurrency=args.concurrency,
+                                       save_history=args.save_history)
+        for stream in open_inputs(args.files):
+            for translated in pipeline.run(read_chunks(stream)):
+                output.write(translated)
+        output.flush()
+        if pipeline.stats['degraded']:
+            print(f"Warning: {pipeline.stats['degraded']} segments are similar past translations, "
+                  f"the backend was unavailable", file=sys.stderr)
+        if pipeline.stats['errors']:
+            print(f"Error: {pipeline.stats['errors']} segments could not be translated and were left "
+                  f"as is ({pipeline.last_error})", file=sys.stderr)
+            return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if args.stats:
+            if pipeline is not None:
+                print(f"Pipeline stats: {pipeline.stats}", file=sys.stderr)
+            print(f"Cache stats: {engine.get_cache_stats()}", file=sys.stderr)
+        engine.close()
+    return 0
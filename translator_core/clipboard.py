@@ -0,0 +1,281 @@
+import ctypes
+import ctypes.util
+import importlib.util
+import os
+import select
+import sys
+import threading
+
+
+def paste_clipboard():
+    """Read clipboard text through pyperclip"""
+    import pyperclip
+    return pyperclip.paste()
+
+
+class ClipboardWatcher:
+    """Calls on_change(text) from a background thread when clipboard text changes
+
+    Subclasses provide an event-driven _run loop. If it cannot start, the
+    watcher falls back to polling with adaptive backoff. While inactive the
+    watcher neither reads the clipboard nor wakes up to poll it.
+    """
+
+    name = 'base'
+
+    def __init__(self, on_change, reader=None, min_interval=0.05, max_interval=1.0, backoff=1.5):
+        self.on_change = on_change
+        self.reader = reader or paste_clipboard
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.last_text = None
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def available(cls):
+        """Check whether this watcher can work on the current system"""
+        return True
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        self._thread = threading.Thread(target=self._run_with_fallback,
+                                        name=f"clipboard-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stopped.set()
+        self._active.set()
+
+    def set_active(self, active):
+        """Enable or disable change notifications"""
+        if active:
+            self._active.set()
+        else:
+            self._active.clear()
+
+    @property
+    def active(self):
+        return self._active.is_set() and not self._stopped.is_set()
+
+    def check(self):
+        """Read the clipboard and notify if its text changed, returning True on change"""
+        if not self.active:
+            return False
+
+        try:
+            text = self.reader()
+        except Exception as e:
+            print(f"Clipboard read error: {e}")
+            return False
+
+        with self._lock:
+            if not text or text == self.last_text:
+                return False
+            self.last_text = text
+
+        try:
+            self.on_change(text)
+        except Exception as e:
+            print(f"Clipboard handler error: {e}")
+        return True
+
+    def _run_with_fallback(self):
+        try:
+            self._run()
+        except Exception as e:
+            if self._stopped.is_set():
+                return
+            print(f"Clipboard watcher '{self.name}' unavailable ({e}), falling back to polling")
+            self._poll()
+
+    def _run(self):
+        self._poll()
+
+    def _poll(self):
+        interval = self.min_interval
+        while not self._stopped.is_set():
+            if not self._active.is_set():
+                # Sleep without waking up until listening is switched on
+                self._active.wait()
+                interval = self.min_interval
+                continue
+
+            if self.check():
+                interval = self.min_interval
+            else:
+                interval = min(self.max_interval, interval * self.backoff)
+            self._stopped.wait(interval)
+
+
+class PollingClipboardWatcher(ClipboardWatcher):
+    """Polls the clipboard, backing off while it does not change"""
+
+    name = 'polling'
+
+
+class Win32ClipboardWatcher(ClipboardWatcher):
+    """Receives WM_CLIPBOARDUPDATE through a hidden message-only window"""
+
+    name = 'win32'
+
+    WM_CLIPBOARDUPDATE = 0x031D
+    HWND_MESSAGE = -3
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hwnd = None
+
+    @classmethod
+    def available(cls):
+        return sys.platform == 'win32' and importlib.util.find_spec('win32gui') is not None
+
+    def stop(self):
+        super().stop()
+        if self._hwnd:
+            import win32con
+            import win32gui
+            win32gui.PostMessage(self._hwnd, win32con.WM_CLOSE, 0, 0)
+
+    def _run(self):
+        import win32api
+        import win32gui
+
+        window_class = win32gui.WNDCLASS()
+        window_class.lpfnWndProc = self._window_proc
+        window_class.lpszClassName = 'UniversalTranslatorClipboardWatcher'
+        window_class.hInstance = win32api.GetModuleHandle(None)
+        class_atom = win32gui.RegisterClass(window_class)
+
+        self._hwnd = win32gui.CreateWindow(class_atom, 'Clipboard Watcher', 0, 0, 0, 0, 0,
+                                           self.HWND_MESSAGE, 0, window_class.hInstance, None)
+        if not ctypes.windll.user32.AddClipboardFormatListener(self._hwnd):
+            raise OSError("AddClipboardFormatListener failed")
+
+        win32gui.PumpMessages()
+
+    def _window_proc(self, hwnd, message, wparam, lparam):
+        import win32con
+        import win32gui
+
+        if message == self.WM_CLIPBOARDUPDATE:
+            self.check()
+            return 0
+        if message == win32con.WM_DESTROY:
+            ctypes.windll.user32.RemoveClipboardFormatListener(hwnd)
+            win32gui.PostQuitMessage(0)
+            return 0
+        return win32gui.DefWindowProc(hwnd, message, wparam, lparam)
+
+
+class X11ClipboardWatcher(ClipboardWatcher):
+    """Receives XFixes selection-owner notifications for the CLIPBOARD selection"""
+
+    name = 'x11'
+
+    XFixesSetSelectionOwnerNotifyMask = 1
+    XFixesSelectionNotify = 0
+
+    @classmethod
+    def available(cls):
+        return (sys.platform.startswith('linux') and bool(os.environ.get('DISPLAY'))
+                and bool(ctypes.util.find_library('X11'))
+                and bool(ctypes.util.find_library('Xfixes')))
+
+    def _run(self):
+        x11 = ctypes.cdll.LoadLibrary(ctypes.util.find_library('X11'))
+        xfixes = ctypes.cdll.LoadLibrary(ctypes.util.find_library('Xfixes'))
+
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        x11.XInternAtom.restype = ctypes.c_ulong
+        x11.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+        x11.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        x11.XPending.argtypes = [ctypes.c_void_p]
+        x11.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        x11.XFlush.argtypes = [ctypes.c_void_p]
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xfixes.XFixesQueryExtension.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int),
+                                                ctypes.POINTER(ctypes.c_int)]
+        xfixes.XFixesSelectSelectionInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong,
+                                                      ctypes.c_ulong, ctypes.c_ulong]
+
+        display = x11.XOpenDisplay(None)
+        if not display:
+            raise OSError("cannot open X display")
+
+        try:
+            event_base, error_base = ctypes.c_int(), ctypes.c_int()
+            if not xfixes.XFixesQueryExtension(display, ctypes.byref(event_base), ctypes.byref(error_base)):
+                raise OSError("XFixes extension not available")
+
+            root = x11.XDefaultRootWindow(display)
+            clipboard = x11.XInternAtom(display, b'CLIPBOARD', 0)
+            xfixes.XFixesSelectSelectionInput(display, root, clipboard,
+                                              self.XFixesSetSelectionOwnerNotifyMask)
+            x11.XFlush(display)
+
+            fd = x11.XConnectionNumber(display)
+            # XEvent is a union padded to 24 longs
+            event = (ctypes.c_long * 24)()
+            notify_type = event_base.value + self.XFixesSelectionNotify
+
+            while not self._stopped.is_set():
+                changed = False
+                while x11.XPending(display):
+                    x11.XNextEvent(display, ctypes.byref(event))
+                    if ctypes.cast(event, ctypes.POINTER(ctypes.c_int))[0] == notify_type:
+                        changed = True
+                if changed:
+                    self.check()
+                # Wake up periodically only to notice stop()
+                select.select([fd], [], [], 0.5)
+        finally:
+            x11.XCloseDisplay(display)
+
+
+class FakeClipboard:
+    """In-memory clipboard for tests and benchmarks"""
+
+    def __init__(self, text=''):
+        self.text = text
+        self.listeners = []
+
+    def paste(self):
+        return self.text
+
+    def copy(self, text):
+        self.text = text
+        for listener in list(self.listeners):
+            listener()
+
+
+class FakeClipboardWatcher(ClipboardWatcher):
+    """Event-driven watcher over a FakeClipboard"""
+
+    name = 'fake'
+
+    def __init__(self, on_change, clipboard=None, **kwargs):
+        self.clipboard = clipboard or FakeClipboard()
+        super().__init__(on_change, reader=self.clipboard.paste, **kwargs)
+        self.clipboard.listeners.append(self.check)
+
+    def _run(self):
+        self._stopped.wait()
+
+
+WATCHERS = [Win32ClipboardWatcher, X11ClipboardWatcher, PollingClipboardWatcher]
+
+
+def create_clipboard_watcher(on_change, reader=None, **options):
+    """Pick the best clipboard watcher available on this system"""
+    for watcher_class in WATCHERS:
+        if watcher_class.available():
+            return watcher_class(on_change, reader=reader, **options)
+    return PollingClipboardWatcher(on_change, reader=reader, **options)
@@ -0,0 +1,166 @@
+import hashlib
+import threading
+import unicodedata
+
+from .cache import MemoryCache, normalize_text
+
+# Unicode ranges of scripts that identify a language (or nearly) on their own
+SCRIPT_RANGES = [
+    (0x3040, 0x30FF, 'kana'),
+    (0x31F0, 0x31FF, 'kana'),
+    (0xAC00, 0xD7AF, 'hangul'),
+    (0x1100, 0x11FF, 'hangul'),
+    (0x3130, 0x318F, 'hangul'),
+    (0x4E00, 0x9FFF, 'han'),
+    (0x3400, 0x4DBF, 'han'),
+    (0x0400, 0x04FF, 'cyrillic'),
+    (0x0600, 0x06FF, 'arabic'),
+    (0x0750, 0x077F, 'arabic'),
+    (0x0590, 0x05FF, 'hebrew'),
+    (0x0370, 0x03FF, 'greek'),
+    (0x0900, 0x097F, 'devanagari'),
+    (0x0E00, 0x0E7F, 'thai'),
+]
+
+SCRIPT_LANGUAGES = {
+    'hangul': 'ko',
+    'han': 'zh-cn',
+    'cyrillic': 'ru',
+    'arabic': 'ar',
+    'hebrew': 'he',
+    'greek': 'el',
+    'devanagari': 'hi',
+    'thai': 'th',
+}
+
+# Letters that only Ukrainian uses among Cyrillic languages
+UKRAINIAN_LETTERS = set('іїєґІЇЄҐ')
+
+
+def script_of(ch):
+    """Return the script name of a character, 'latin' or None"""
+    code = ord(ch)
+    for start, end, script in SCRIPT_RANGES:
+        if start <= code <= end:
+            return script
+    if ch.isalpha() and unicodedata.name(ch, '').startswith('LATIN'):
+        return 'latin'
+    return None
+
+
+def classify_script(text, threshold=0.6):
+    """Guess the language from the writing system alone, returning (lang, confidence) or None"""
+    counts = {}
+    letters = 0
+    for ch in text:
+        if not ch.isalpha():
+            continue
+        letters += 1
+        script = script_of(ch)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+
+    if not letters:
+        return None
+
+    # Japanese mixes kana with han, any amount of kana settles it
+    if counts.get('kana', 0) / letters >= 0.1:
+        return 'ja', 0.99
+
+    script, count = max(counts.items(), key=lambda item: item[1], default=(None, 0))
+    share = count / letters
+    if script not in SCRIPT_LANGUAGES or share < threshold:
+        return None
+
+    if script == 'cyrillic' and UKRAINIAN_LETTERS.intersection(text):
+        return 'uk', 0.9 * share
+    if script in ('cyrillic', 'arabic'):
+        # Shared by several languages, the statistical detector may still refine it
+        return SCRIPT_LANGUAGES[script], 0.8 * share
+    return SCRIPT_LANGUAGES[script], 0.99 * share
+
+
+class LanguageDetector:
+    """Language detection with a script pre-classifier, result cache and lazy langdetect
+
+    langdetect profiles are loaded once, in the background when warm_up()
+    is called at startup, and the detector is seeded so results are
+    deterministic. Short Latin-script strings on which langdetect is not
+    confident fall back to the default language instead of producing
+    false positives.
+    """
+
+    def __init__(self, default='en', cache_size=4096, short_text_chars=30, min_short_confidence=0.9):
+        self.default = default
+        self.short_text_chars = short_text_chars
+        self.min_short_confidence = min_short_confidence
+        self.cache = MemoryCache(max_entries=cache_size, ttl=None)
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._available = True
+        self.stats = {'cache_hits': 0, 'script_hits': 0, 'langdetect_calls': 0}
+
+    def warm_up(self, background=True):
+        """Load langdetect profiles now, optionally in a background thread"""
+        if background:
+            threading.Thread(target=self._ensure_loaded, name='langdetect-warmup', daemon=True).start()
+        else:
+            self._ensure_loaded()
+
+    def _ensure_loaded(self):
+        with self._load_lock:
+            if self._loaded:
+                return self._available
+            try:
+                from langdetect import DetectorFactory
+                from langdetect.detector_factory import init_factory
+                DetectorFactory.seed = 0
+                init_factory()
+            except ImportError:
+                print("langdetect package not found")
+                self._available = False
+            self._loaded = True
+            return self._available
+
+    def detect(self, text):
+        """Detect the language of text, returning (lang, confidence)"""
+        if not text or not text.strip():
+            return self.default, 0.0
+
+        key = hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats['cache_hits'] += 1
+            return cached
+
+        result = classify_script(text)
+        if result is not None:
+            self.stats['script_hits'] += 1
+        else:
+            result = self._detect_statistically(text)
+
+        self.cache.put(key, result)
+        return result
+
+    def detect_language(self, text):
+        """Detect the language code of text"""
+        return self.detect(text)[0]
+
+    def _detect_statistically(self, text):
+        if not self._ensure_loaded():
+            return self.default, 0.0
+
+        self.stats['langdetect_calls'] += 1
+        try:
+            from langdetect import detect_langs
+            candidates = detect_langs(text)
+        except Exception:
+            return self.default, 0.0
+
+        if not candidates:
+            return self.default, 0.0
+
+        best = candidates[0]
+        if len(text.strip()) < self.short_text_chars and best.prob < self.min_short_confidence:
+            return self.default, 1.0 - best.prob
+        return best.lang, best.prob
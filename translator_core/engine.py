@@ -0,0 +1,397 @@
+import os
+import threading
+from concurrent.futures import Future
+
+from .audio import AudioCache, ClipMemory, make_audio_key
+from .backends import chunk_texts, create_backend
+from .cache import TranslationCache
+from .detection import LanguageDetector
+from .history import HistoryStore, RetentionPolicy
+from .memory import DegradedTranslation, TranslationMemory
+from .resilience import ResilienceError, ResilientBackend, is_provider_failure
+from .speech import create_synthesizer, split_speech, stream_chunks
+from .transfer import export_history, import_history
+
+# Language mappings
+LANGUAGES = {
+    'en': 'English', 'es': 'Spanish', 'fr': 'French', 'de': 'German',
+    'it': 'Italian', 'pt': 'Portuguese', 'ru': 'Russian', 'ja': 'Japanese',
+    'ko': 'Korean', 'zh': 'Chinese (Simplified)', 'ar': 'Arabic', 'hi': 'Hindi',
+    'nl': 'Dutch', 'sv': 'Swedish', 'no': 'Norwegian', 'da': 'Danish',
+    'fi': 'Finnish', 'pl': 'Polish', 'cs': 'Czech', 'sk': 'Slovak',
+    'hu': 'Hungarian', 'ro': 'Romanian', 'bg': 'Bulgarian', 'hr': 'Croatian'
+}
+
+
+class TranslatorEngine:
+    """UI-free translation engine owning the backend, cache and history store"""
+
+    def __init__(self, backend='googletrans', backend_options=None, data_dir='translator_data',
+                 retention=None, memory_threshold=None, synthesizer='gtts', synthesizer_options=None,
+                 spill_audio=True, lazy_backend=False, fallback_backend=None, fallback_options=None,
+                 hedge_after=None, rate_limit=None, fallback_threshold=0.8):
+        self.backend_name = backend
+        self.backend_options = dict(backend_options or {})
+        # Used when the primary is throttled, failing or (with hedge_after) slow
+        self.fallback_backend = fallback_backend
+        self.fallback_options = dict(fallback_options or {})
+        self.hedge_after = hedge_after
+        self.rate_limit = rate_limit
+        self._translator = None
+        self._backend_loaded = False
+        self._backend_lock = threading.Lock()
+        # A lazy backend (and its imports) is created by load_backend() or on first use
+        if not lazy_backend:
+            self.load_backend()
+
+        self.synthesizer = create_synthesizer(synthesizer, **(synthesizer_options or {}))
+        # Clips live in memory, spill_audio also keeps them on disk across sessions
+        self.audio_clips = ClipMemory()
+        self.spill_audio = spill_audio
+        # Clips being synthesized, a second request for one waits instead of synthesizing again
+        self._speech_pending = {}
+        self._speech_lock = threading.Lock()
+        self.speech_stats = {'prefetched': 0, 'prefetch_cancelled': 0, 'coalesced': 0}
+        self.languages = dict(LANGUAGES)
+        # Profiles load on first use unless the caller warms the detector up
+        self.detector = LanguageDetector(default='en')
+        self.data_dir = data_dir
+        self.retention = retention or RetentionPolicy()
+        # Exact matches from translation memory skip the provider, near matches only
+        # when opted in with a threshold (a small edit can flip the meaning)
+        self.memory_threshold = memory_threshold
+        # While the provider is unavailable, looser matches are better than an error
+        self.fallback_threshold = fallback_threshold
+        self.memory_enabled = False
+        self.init_database()
+
+    def init_database(self):
+        """Initialize SQLite database for translation history"""
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+
+        self.db_path = os.path.join(self.data_dir, 'history.db')
+        self.history = HistoryStore(self.db_path)
+
+        # Cache consulted before any call to the translation service
+        self.translation_cache = TranslationCache(self.db_path)
+        self.memory = TranslationMemory(self.history)
+
+        # Synthesized speech, replays skip the TTS service
+        self.audio_cache = AudioCache(os.path.join(self.data_dir, 'audio_cache'),
+                                      suffix='.' + self.synthesizer.format)
+
+    def load_backend(self):
+        """Create the translation backend if that has not happened yet and return it
+
+        ImportError is left to the caller so it can tell the user what to install.
+        """
+        with self._backend_lock:
+            if self._backend_loaded:
+                return self._translator
+            try:
+                primary = create_backend(self.backend_name, **self.backend_options)
+            except ImportError:
+                self._backend_loaded = True
+                raise
+            except Exception as e:
+                print(f"Translator initialization warning: {e}")
+                self._backend_loaded = True
+                return None
+
+            secondary = None
+            if self.fallback_backend:
+                try:
+                    secondary = create_backend(self.fallback_backend, **self.fallback_options)
+                except Exception as e:
+                    print(f"Fallback backend not available: {e}")
+            # Rate limiting, circuit breaking and failover around the provider
+            self._translator = ResilientBackend(primary, secondary, hedge_after=self.hedge_after,
+                                                rate_limit=self.rate_limit)
+            self._backend_loaded = True
+            return self._translator
+
+    @property
+    def translator(self):
+        """The translation backend, None when it could not be created"""
+        if not self._backend_loaded:
+            try:
+                self.load_backend()
+            except ImportError as e:
+                print(f"Translation backend not available: {e}")
+        return self._translator
+
+    def save_translation(self, source, translated, source_lang, target_lang, supersedes=None):
+        """Queue translation for the history writer"""
+        self.history.add(source, translated, source_lang, target_lang, supersedes=supersedes)
+        if self.memory_enabled:
+            self.memory.add(source, translated, source_lang, target_lang)
+
+    def load_memory(self, background=True):
+        """Build the translation memory index from history"""
+        self.memory_enabled = True
+        self.memory.load(background=background)
+
+    def lookup_memory(self, text, source_lang, target_lang, limit=3):
+        """Return past translations similar to text, each with a similarity 'score'"""
+        return self.memory.lookup(text, source_lang, target_lang, limit=limit)
+
+    def start_maintenance(self, interval=3600):
+        """Apply retention and compact the history database periodically in the background"""
+        def prune_cache():
+            self.translation_cache.prune(self.retention.max_age_days, self.retention.max_rows,
+                                         self.retention.max_cache_bytes)
+
+        self.history.start_maintenance(self.retention, interval=interval, extra_jobs=[prune_cache])
+
+    def search_history(self, query=None, source_lang=None, target_lang=None, before=None, limit=50):
+        """Search translation history one page at a time, see HistoryStore.search"""
+        return self.history.search(query, source_lang, target_lang, before, limit)
+
+    def export_history(self, path, fmt=None):
+        """Write the whole history to a JSONL, CSV or Parquet file"""
+        return export_history(self.history, path, fmt)
+
+    def import_history(self, path, fmt=None):
+        """Bulk load an exported history file and seed the cache and translation memory from it"""
+        imported = import_history(self.history, path, fmt)
+        self.translation_cache.seed_from_history()
+        if self.memory_enabled:
+            self.memory.load(background=False)
+        return imported
+
+    def get_language_code(self, language_name):
+        """Get language code from language name"""
+        for code, name in self.languages.items():
+            if name == language_name:
+                return code
+        return 'en'
+
+    def translate_text(self, text, source_lang, target_lang):
+        """Translate text using the selected translation backend"""
+        try:
+            if not text.strip():
+                return ""
+
+            if self.translator is None:
+                return "Translation service not available"
+
+            cached = self.translation_cache.get(text, source_lang, target_lang)
+            if cached is not None:
+                return cached
+
+            remembered = self._serve_from_memory(text, source_lang, target_lang)
+            if remembered is not None:
+                return remembered
+
+            # Use the selected backend for translation
+            translated = self.translator.translate(text, source_lang, target_lang)
+            self.translation_cache.put(text, source_lang, target_lang, translated)
+            return translated
+
+        except Exception as e:
+            print(f"Translation error: {e}")
+            # Throttled or down: a close past translation beats an error (not cached)
+            fallback = self._serve_degraded(text, source_lang, target_lang)
+            if fallback is not None:
+                return fallback
+            # Try with auto-detect if the source language was refused; a throttled or
+            # unreachable provider would only be asked again
+            if (source_lang and source_lang != 'auto' and not isinstance(e, ResilienceError) and
+                    not is_provider_failure(e)):
+                try:
+                    translated = self.translator.translate(text, 'auto', target_lang)
+                    self.translation_cache.put(text, source_lang, target_lang, translated)
+                    return translated
+                except:
+                    pass
+            return f"Translation error: {str(e)}"
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        """Translate many texts, grouping cache misses into batched provider requests"""
+        results = [None] * len(texts)
+        pending = {}
+
+        for index, text in enumerate(texts):
+            if not text.strip():
+                results[index] = ""
+                continue
+            cached = self.translation_cache.get(text, source_lang, target_lang)
+            if cached is None:
+                cached = self._serve_from_memory(text, source_lang, target_lang)
+            if cached is not None:
+                results[index] = cached
+            else:
+                # Identical segments share one slot in the provider request
+                pending.setdefault(text, []).append(index)
+
+        if not pending:
+            return results
+
+        if self.translator is None:
+            for indices in pending.values():
+                for index in indices:
+                    results[index] = "Translation service not available"
+            return results
+
+        capabilities = self.translator.capabilities()
+        batches = chunk_texts(list(pending), capabilities.get('max_batch_items', 1),
+                              capabilities.get('max_batch_chars'))
+        for batch in batches:
+            try:
+                translated = self.translator.translate_batch(batch, source_lang, target_lang)
+                if len(translated) != len(batch):
+                    raise ValueError(f"expected {len(batch)} results, got {len(translated)}")
+                self.translation_cache.put_many(zip(batch, translated), source_lang, target_lang)
+            except ResilienceError as e:
+                print(f"Batch translation refused: {e}")
+                # Retrying segment by segment would only hit the limiter or breaker again
+                translated = []
+                for text in batch:
+                    fallback = self._serve_degraded(text, source_lang, target_lang)
+                    translated.append(fallback if fallback is not None else f"Translation error: {str(e)}")
+            except Exception as e:
+                print(f"Batch translation error: {e}")
+                # Fall back to translating each segment on its own
+                translated = [self.translate_text(text, source_lang, target_lang) for text in batch]
+
+            for text, result in zip(batch, translated):
+                for index in pending[text]:
+                    results[index] = result
+
+        return results
+
+    def _serve_from_memory(self, text, source_lang, target_lang):
+        if not self.memory_enabled:
+            return None
+        threshold = 1.0 if self.memory_threshold is None else self.memory_threshold
+        match = self.memory.best_servable(text, source_lang, target_lang, threshold)
+        return match['translated_text'] if match else None
+
+    def _serve_degraded(self, text, source_lang, target_lang):
+        if not self.memory_enabled:
+            return None
+        match = self.memory.best_servable(text, source_lang, target_lang, self.fallback_threshold)
+        if match is None:
+            return None
+        return DegradedTranslation(match['translated_text'], match['score'], match['source_text'])
+
+    def backend_stats(self):
+        """Rate limiter, circuit breaker and failover counters of the backend"""
+        if self._translator is None:
+            return {}
+        return self._translator.backend_stats()
+
+    def detect_language(self, text):
+        """Detect language of text"""
+        return self.detector.detect(text)[0]
+
+    def detect_language_confidence(self, text):
+        """Detect language of text, returning (language, confidence)"""
+        return self.detector.detect(text)
+
+    def synthesize_audio(self, text, language='en'):
+        """Return encoded audio for text, from memory, the disk cache or the synthesizer"""
+        try:
+            if not text.strip():
+                return None
+
+            voice = self.synthesizer.voice
+            key = make_audio_key(text, language, voice)
+            audio = self.audio_clips.get(key)
+            if audio is not None:
+                return audio
+
+            with self._speech_lock:
+                pending = self._speech_pending.get(key)
+                owner = pending is None
+                if owner:
+                    pending = self._speech_pending[key] = Future()
+                else:
+                    self.speech_stats['coalesced'] += 1
+            if not owner:
+                return pending.result()
+
+            try:
+                if self.spill_audio:
+                    audio = self.audio_cache.read(text, language, voice)
+                if audio is None:
+                    audio = self.synthesizer.synthesize(text, language)
+                    if self.spill_audio:
+                        self.audio_cache.put(text, language, audio, voice)
+                self.audio_clips.put(key, audio)
+            finally:
+                with self._speech_lock:
+                    del self._speech_pending[key]
+                pending.set_result(audio)
+            return audio
+
+        except ImportError:
+            print("gTTS package not available")
+            return None
+        except Exception as e:
+            print(f"TTS error: {e}")
+            return None
+
+    def prefetch_speech(self, text, language='en', is_current=None):
+        """Synthesize text ahead of playback, sentence by sentence, into the clip cache
+
+        Stops between sentences once is_current() returns False, such as when
+        the text changed. Returns the number of sentences now cached.
+        """
+        ready = 0
+        for chunk in split_speech(text):
+            if is_current is not None and not is_current():
+                self.speech_stats['prefetch_cancelled'] += 1
+                break
+            if self.synthesize_audio(chunk, language) is not None:
+                ready += 1
+        self.speech_stats['prefetched'] += ready
+        return ready
+
+    def text_to_speech(self, text, language='en'):
+        """Convert text to speech and return the path of the cached audio file"""
+        audio = self.synthesize_audio(text, language)
+        if audio is None:
+            return None
+
+        voice = self.synthesizer.voice
+        try:
+            path = self.audio_cache.get(text, language, voice)
+            return path or self.audio_cache.put(text, language, audio, voice)
+        except OSError as e:
+            print(f"TTS error: {e}")
+            return None
+
+    def stream_speech(self, text, language='en', lookahead=2):
+        """Yield encoded audio sentence by sentence, synthesizing ahead of playback
+
+        The first clip is ready once the first sentence is synthesized, so
+        playback can start long before a long text is done. Chunks that fail
+        to synthesize are skipped.
+        """
+        chunks = split_speech(text)
+        for audio in stream_chunks(lambda chunk: self.synthesize_audio(chunk, language), chunks, lookahead):
+            if audio is not None:
+                yield audio
+
+    def get_cache_stats(self):
+        """Get translation cache hit/miss counters"""
+        return self.translation_cache.stats()
+
+    def get_audio_cache_stats(self):
+        """Get audio cache hit/miss counters and size"""
+        stats = self.audio_cache.stats()
+        stats['memory_hits'] = self.audio_clips.hits
+        stats['memory_clips'] = len(self.audio_clips)
+        stats['memory_bytes'] = self.audio_clips.size_bytes
+        return stats
+
+    def close(self):
+        """Flush pending history writes and release resources held by the engine"""
+        self.history.close()
+        self.translation_cache.close()
+        # Pooled connections of the http backend
+        close_backend = getattr(self._translator, 'close', None)
+        if close_backend:
+            close_backend()
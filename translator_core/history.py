@@ -0,0 +1,563 @@
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .cache import CACHE_KEY_VERSION, make_cache_key, table_bytes
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    terms = []
+    for word in text.split():
+        terms.append('"' + word.replace('"', '""') + '"*')
+    return ' '.join(terms)
+
+
+class RetentionPolicy:
+    """Limits applied to the history by the maintenance job, None disables a limit
+
+    max_bytes bounds the history and its indexes, max_cache_bytes the
+    translation cache kept in the same file.
+    """
+
+    def __init__(self, max_age_days=365, max_rows=1_000_000, max_bytes=512 * 1024 * 1024,
+                 max_cache_bytes=64 * 1024 * 1024):
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_cache_bytes = max_cache_bytes
+
+
+class HistoryStore:
+    """Translation history in SQLite behind a write-behind queue
+
+    One long-lived connection in WAL mode is shared by all callers. Writes
+    are queued and a background writer flushes them in batched
+    transactions, so saving a translation never waits on disk. Repeated
+    (source language, target language, text) rows collapse into one row
+    with a hit count and last-seen time.
+    """
+
+    # Older databases up to this size switch to incremental vacuum when opened
+    CONVERT_ON_OPEN_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, db_path, batch_size=200, flush_interval=0.5):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.stats = {'queued': 0, 'written': 0, 'transactions': 0}
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Only takes effect for new databases, see enable_incremental_vacuum for older ones
+        self.conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        # WAL keeps the database consistent with NORMAL, only the last commits can be lost on power failure
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.fts_enabled = False
+        self.init_schema()
+        if os.path.getsize(db_path) <= self.CONVERT_ON_OPEN_BYTES:
+            # Quick while the file is small and nothing else writes yet
+            self.enable_incremental_vacuum()
+
+        # Readers get their own connection, WAL lets them run alongside the writer
+        self.read_conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.read_conn.row_factory = sqlite3.Row
+        self.read_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._maintenance_stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def init_schema(self):
+        """Create the translations table, its indexes and the full-text index"""
+        with self.lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS translations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_text TEXT,
+                    translated_text TEXT,
+                    source_lang TEXT,
+                    target_lang TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    hit_count INTEGER NOT NULL DEFAULT 1,
+                    source_hash TEXT
+                )
+            ''')
+            self.migrate_dedup_columns()
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_translations_langs_time '
+                              'ON translations (source_lang, target_lang, timestamp)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_translations_time '
+                              'ON translations (timestamp)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_translations_last_seen '
+                              'ON translations (last_seen)')
+            self.init_fts()
+            self.conn.commit()
+
+    def migrate_dedup_columns(self):
+        """Add hit counting to databases created before deduplication, merging duplicates"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(translations)')}
+        if 'source_hash' not in columns:
+            # SQLite cannot add columns with a non-constant default
+            self.conn.execute('ALTER TABLE translations ADD COLUMN last_seen DATETIME')
+            self.conn.execute('ALTER TABLE translations ADD COLUMN hit_count INTEGER NOT NULL DEFAULT 1')
+            self.conn.execute('ALTER TABLE translations ADD COLUMN source_hash TEXT')
+        elif self.conn.execute('PRAGMA user_version').fetchone()[0] < CACHE_KEY_VERSION:
+            # Hashes from an older make_cache_key would miss their rows, recompute and refold them all
+            self.conn.execute('DROP INDEX IF EXISTS idx_translations_source_hash')
+            self.conn.execute('UPDATE translations SET source_hash = NULL')
+
+        missing = self.conn.execute(
+            'SELECT 1 FROM translations WHERE source_hash IS NULL LIMIT 1').fetchone()
+        if missing:
+            self.conn.create_function('source_hash', 3, make_cache_key, deterministic=True)
+            self.conn.execute('''
+                UPDATE translations
+                SET source_hash = source_hash(COALESCE(source_text, ''), source_lang, target_lang),
+                    last_seen = COALESCE(last_seen, timestamp)
+                WHERE source_hash IS NULL
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_translations_source_hash_tmp '
+                              'ON translations (source_hash)')
+            # Fold duplicates into the newest row of each group
+            self.conn.execute('''
+                UPDATE translations
+                SET hit_count = (SELECT SUM(d.hit_count) FROM translations d
+                                 WHERE d.source_hash = translations.source_hash),
+                    last_seen = (SELECT MAX(d.last_seen) FROM translations d
+                                 WHERE d.source_hash = translations.source_hash),
+                    timestamp = (SELECT MIN(d.timestamp) FROM translations d
+                                 WHERE d.source_hash = translations.source_hash)
+                WHERE id IN (SELECT MAX(id) FROM translations
+                             GROUP BY source_hash HAVING COUNT(*) > 1)
+            ''')
+            self.conn.execute('''
+                DELETE FROM translations
+                WHERE id NOT IN (SELECT MAX(id) FROM translations GROUP BY source_hash)
+            ''')
+            self.conn.execute('DROP INDEX idx_translations_source_hash_tmp')
+
+        self.conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_translations_source_hash '
+                          'ON translations (source_hash)')
+        self.conn.execute(f'PRAGMA user_version = {CACHE_KEY_VERSION}')
+
+    def init_fts(self):
+        """Create the FTS5 index over source and translated text, if SQLite supports it"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='translations_fts'"
+        ).fetchone()
+        try:
+            self.conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS translations_fts USING fts5(
+                    source_text, translated_text,
+                    content='translations', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search not available: {e}")
+            return
+
+        # Keep the external-content index in step with the table
+        self.conn.executescript('''
+            CREATE TRIGGER IF NOT EXISTS translations_fts_insert AFTER INSERT ON translations BEGIN
+                INSERT INTO translations_fts (rowid, source_text, translated_text)
+                VALUES (new.id, new.source_text, new.translated_text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS translations_fts_delete AFTER DELETE ON translations BEGIN
+                INSERT INTO translations_fts (translations_fts, rowid, source_text, translated_text)
+                VALUES ('delete', old.id, old.source_text, old.translated_text);
+            END;
+            DROP TRIGGER IF EXISTS translations_fts_update;
+            CREATE TRIGGER translations_fts_update AFTER UPDATE OF source_text, translated_text
+            ON translations
+            WHEN old.source_text IS NOT new.source_text OR old.translated_text IS NOT new.translated_text
+            BEGIN
+                INSERT INTO translations_fts (translations_fts, rowid, source_text, translated_text)
+                VALUES ('delete', old.id, old.source_text, old.translated_text);
+                INSERT INTO translations_fts (rowid, source_text, translated_text)
+                VALUES (new.id, new.source_text, new.translated_text);
+            END;
+        ''')
+        if not exists:
+            # Index history written before full-text search existed
+            self.conn.execute("INSERT INTO translations_fts (translations_fts) VALUES ('rebuild')")
+        self.fts_enabled = True
+
+    def search(self, query=None, source_lang=None, target_lang=None, before=None, limit=50):
+        """Return one page of history rows, newest first, and the cursor for the next page
+
+        Pagination is keyset based: pass the returned cursor as `before` to
+        get the following page. The cursor is None once history is exhausted.
+        """
+        use_fts = bool(query and query.strip() and self.fts_enabled)
+
+        conditions, params = [], []
+        if source_lang:
+            conditions.append('t.source_lang = ?')
+            params.append(source_lang)
+        if target_lang:
+            conditions.append('t.target_lang = ?')
+            params.append(target_lang)
+        if before is not None:
+            if use_fts:
+                # FTS5 walks its rowids in order, ids grow with time like timestamps
+                conditions.append('f.rowid < ?')
+                params.append(before[1])
+            else:
+                conditions.append('(t.timestamp, t.id) < (?, ?)')
+                params.extend(before)
+
+        if use_fts:
+            sql = ('SELECT t.* FROM translations_fts f JOIN translations t ON t.id = f.rowid '
+                   'WHERE translations_fts MATCH ?')
+            params.insert(0, fts_query(query))
+            order = ' ORDER BY f.rowid DESC'
+        elif query and query.strip():
+            sql = 'SELECT t.* FROM translations t WHERE (t.source_text LIKE ? OR t.translated_text LIKE ?)'
+            pattern = f"%{query.strip()}%"
+            params[0:0] = [pattern, pattern]
+            order = ' ORDER BY t.timestamp DESC, t.id DESC'
+        else:
+            sql = 'SELECT t.* FROM translations t WHERE 1'
+            order = ' ORDER BY t.timestamp DESC, t.id DESC'
+
+        for condition in conditions:
+            sql += f' AND {condition}'
+        sql += order + ' LIMIT ?'
+        params.append(limit)
+
+        with self.read_lock:
+            rows = [dict(row) for row in self.read_conn.execute(sql, params)]
+
+        cursor = (rows[-1]['timestamp'], rows[-1]['id']) if len(rows) == limit else None
+        return rows, cursor
+
+    def add(self, source, translated, source_lang, target_lang, supersedes=None):
+        """Queue a translation for writing
+
+        supersedes names an earlier source text (same languages) that this
+        one replaces, such as a partial sentence typed a moment ago. That
+        row is dropped unless it was seen more than once.
+        """
+        if self._closed:
+            raise RuntimeError("history store is closed")
+        # Stamp now, the row may reach the database a moment later
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        superseded_hash = make_cache_key(supersedes, source_lang, target_lang) if supersedes else None
+        self._queue.put((source, translated, source_lang, target_lang, timestamp,
+                         make_cache_key(source, source_lang, target_lang), superseded_hash))
+        self.stats['queued'] += 1
+
+    def flush(self):
+        """Block until every queued translation has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Flush pending writes and close the connection"""
+        if self._closed:
+            return
+        self._closed = True
+        self._maintenance_stop.set()
+        self._queue.put(None)
+        self._writer.join()
+        with self.lock:
+            self.conn.close()
+        with self.read_lock:
+            self.read_conn.close()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            batch = [] if item is None else [item]
+            stopping = item is None
+            received = 1
+
+            # Gather whatever else arrives shortly into the same transaction
+            deadline = time.monotonic() + self.flush_interval
+            while not stopping and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                received += 1
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            try:
+                if batch:
+                    self._write_batch(batch)
+            except Exception as e:
+                print(f"History write error: {e}")
+            finally:
+                for _ in range(received):
+                    self._queue.task_done()
+
+            if stopping:
+                return
+
+    UPSERT_SQL = '''
+        INSERT INTO translations
+            (source_text, translated_text, source_lang, target_lang, timestamp, last_seen, source_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (source_hash) DO UPDATE SET
+            hit_count = hit_count + 1,
+            last_seen = excluded.last_seen,
+            translated_text = excluded.translated_text
+    '''
+
+    def _write_batch(self, batch):
+        with self.lock:
+            with self.conn:
+                run = []
+                for source, translated, source_lang, target_lang, timestamp, source_hash, superseded in batch:
+                    if superseded and superseded != source_hash:
+                        # Keep the order of writes: flush what came before, then drop the partial row
+                        self.conn.executemany(self.UPSERT_SQL, run)
+                        run = []
+                        self.conn.execute('DELETE FROM translations WHERE source_hash = ? AND hit_count = 1',
+                                          (superseded,))
+                    run.append((source, translated, source_lang, target_lang, timestamp, timestamp, source_hash))
+                self.conn.executemany(self.UPSERT_SQL, run)
+        self.stats['written'] += len(batch)
+        self.stats['transactions'] += 1
+
+    EXPORT_COLUMNS = ('source_text', 'translated_text', 'source_lang', 'target_lang',
+                      'timestamp', 'last_seen', 'hit_count')
+
+    # Imported rows merge with existing ones: counts add up and the newest translation wins
+    IMPORT_SQL = '''
+        INSERT INTO translations
+            (source_text, translated_text, source_lang, target_lang, timestamp, last_seen, hit_count,
+             source_hash)
+        SELECT * FROM temp.import_staging WHERE true ORDER BY source_hash
+        ON CONFLICT (source_hash) DO UPDATE SET
+            hit_count = hit_count + excluded.hit_count,
+            timestamp = MIN(timestamp, excluded.timestamp),
+            last_seen = MAX(last_seen, excluded.last_seen),
+            translated_text = CASE WHEN excluded.last_seen >= last_seen
+                                   THEN excluded.translated_text ELSE translated_text END
+    '''
+
+    def iter_rows(self, batch_size=10000):
+        """Yield all history rows as lists of EXPORT_COLUMNS tuples, oldest first"""
+        self.flush()
+        columns = ', '.join(self.EXPORT_COLUMNS)
+        last_id = 0
+        while True:
+            # Keyset over the primary key so the read lock is only held per batch
+            with self.read_lock:
+                rows = self.read_conn.execute(
+                    f'SELECT id, {columns} FROM translations WHERE id > ? ORDER BY id LIMIT ?',
+                    (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [tuple(row)[1:] for row in rows]
+
+    def import_rows(self, rows, batch_size=50000):
+        """Bulk insert EXPORT_COLUMNS tuples, one transaction per batch
+
+        Each batch goes into an unindexed temporary table with executemany
+        and is then merged sorted by hash, so the unique index is filled in
+        order instead of at random.
+        """
+        self.flush()
+        now = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        imported = 0
+        batch = []
+        with self.lock:
+            self.conn.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS import_staging (
+                    source_text, translated_text, source_lang, target_lang,
+                    timestamp, last_seen, hit_count, source_hash
+                )
+            ''')
+            cache_size = self.conn.execute('PRAGMA cache_size').fetchone()[0]
+            self.conn.execute('PRAGMA cache_size=-65536')
+            try:
+                for source, translated, source_lang, target_lang, timestamp, last_seen, hit_count in rows:
+                    if source is None or translated is None:
+                        continue
+                    timestamp = timestamp or now
+                    batch.append((source, translated, source_lang, target_lang, timestamp,
+                                  last_seen or timestamp, int(hit_count or 1),
+                                  make_cache_key(source, source_lang, target_lang)))
+                    if len(batch) >= batch_size:
+                        imported += self._import_batch(batch)
+                        batch = []
+                if batch:
+                    imported += self._import_batch(batch)
+            finally:
+                self.conn.execute('DROP TABLE IF EXISTS temp.import_staging')
+                self.conn.execute(f'PRAGMA cache_size={cache_size}')
+        return imported
+
+    def _import_batch(self, batch):
+        # Caller holds the lock
+        with self.conn:
+            self.conn.executemany('INSERT INTO temp.import_staging VALUES (?, ?, ?, ?, ?, ?, ?, ?)', batch)
+            trigger = self.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type='trigger' AND name='translations_fts_insert'"
+            ).fetchone()
+            if trigger:
+                # Index new rows in one statement rather than per row, within the same transaction
+                last_id = self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM translations').fetchone()[0]
+                self.conn.execute('DROP TRIGGER translations_fts_insert')
+            self.conn.execute(self.IMPORT_SQL)
+            if trigger:
+                self.conn.execute('''
+                    INSERT INTO translations_fts (rowid, source_text, translated_text)
+                    SELECT id, source_text, translated_text FROM translations WHERE id > ?
+                ''', (last_id,))
+                self.conn.execute(trigger[0])
+            self.conn.execute('DELETE FROM temp.import_staging')
+        self.stats['imported'] = self.stats.get('imported', 0) + len(batch)
+        return len(batch)
+
+    def size_bytes(self):
+        """Bytes used by live pages of the database file"""
+        with self.read_lock:
+            page_size = self.read_conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = self.read_conn.execute('PRAGMA page_count').fetchone()[0]
+            free_pages = self.read_conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    HISTORY_TABLES = ('translations', 'translations_fts_data', 'translations_fts_idx',
+                      'translations_fts_docsize', 'translations_fts_config')
+
+    def history_bytes(self):
+        """Bytes used by the history table, its indexes and full-text index
+
+        Other tables in the file, like the translation cache, do not count.
+        Without SQLite's dbstat table the size is estimated from the text.
+        """
+        with self.read_lock:
+            used = table_bytes(self.read_conn, self.HISTORY_TABLES)
+            if used is None:
+                # The row, the hash index and the full-text index each hold about the text once
+                used = self.read_conn.execute('''
+                    SELECT COALESCE(SUM(LENGTH(CAST(source_text AS BLOB)) +
+                                        LENGTH(CAST(translated_text AS BLOB)) + 100), 0) * 3
+                    FROM translations
+                ''').fetchone()[0]
+        return used
+
+    def apply_retention(self, policy, chunk_size=5000):
+        """Delete rows beyond the policy's age, row and size limits, returning the count"""
+        deleted = 0
+        if policy.max_age_days is not None:
+            cutoff = time.strftime('%Y-%m-%d %H:%M:%S',
+                                   time.gmtime(time.time() - policy.max_age_days * 86400))
+            deleted += self._delete_oldest('WHERE last_seen < ?', (cutoff,), chunk_size)
+
+        if policy.max_rows is not None:
+            with self.read_lock:
+                rows = self.read_conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+            if rows > policy.max_rows:
+                deleted += self._delete_oldest('', (), chunk_size, limit=rows - policy.max_rows)
+
+        if policy.max_bytes is not None:
+            # Measured on the history alone, the cache is pruned to its own budget
+            used = self.history_bytes()
+            while used > policy.max_bytes:
+                with self.read_lock:
+                    rows = self.read_conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+                if not rows:
+                    break
+                # Estimate from the average row size, with some slack
+                excess = math.ceil((used - policy.max_bytes) / (used / rows) * 1.1)
+                removed = self._delete_oldest('', (), chunk_size, limit=min(rows, max(excess, 1)))
+                deleted += removed
+                self.incremental_vacuum()
+                previous, used = used, self.history_bytes()
+                # Partly filled pages can keep the size from dropping, deleting more would not help
+                if not removed or used >= previous:
+                    break
+
+        self.stats['retention_deleted'] = self.stats.get('retention_deleted', 0) + deleted
+        return deleted
+
+    def _delete_oldest(self, where, params, chunk_size, limit=None):
+        # Delete in small transactions so queued writes are never held up for long
+        deleted = 0
+        while limit is None or deleted < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - deleted)
+            with self.lock:
+                with self.conn:
+                    cursor = self.conn.execute(f'''
+                        DELETE FROM translations WHERE id IN (
+                            SELECT id FROM translations {where} ORDER BY last_seen LIMIT ?
+                        )
+                    ''', (*params, size))
+            deleted += cursor.rowcount
+            if cursor.rowcount < size:
+                break
+        return deleted
+
+    def enable_incremental_vacuum(self):
+        """Switch a database created without incremental auto-vacuum over, True if it ran
+
+        This takes one full VACUUM, which rewrites the file and blocks every
+        writer meanwhile, so it runs when a small database is opened or on
+        request (--vacuum), never from the maintenance job.
+        """
+        with self.lock:
+            if self.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                return False
+            self.conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            self.conn.execute('VACUUM')
+        return True
+
+    def incremental_vacuum(self, pages_per_step=512):
+        """Return free pages to the file system a few at a time"""
+        with self.lock:
+            mode = self.conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        if mode != 2:
+            # Free pages are reused by later writes until enable_incremental_vacuum() has run
+            return
+
+        while not self._maintenance_stop.is_set():
+            with self.lock:
+                free_pages = self.conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if not free_pages:
+                    return
+                self.conn.execute(f'PRAGMA incremental_vacuum({pages_per_step})').fetchall()
+            time.sleep(0.01)
+
+    def compact(self, policy=None):
+        """Run one maintenance pass: retention, index optimization and incremental vacuum"""
+        deleted = self.apply_retention(policy) if policy is not None else 0
+        if self.fts_enabled:
+            with self.lock:
+                with self.conn:
+                    self.conn.execute("INSERT INTO translations_fts (translations_fts) VALUES ('optimize')")
+        self.incremental_vacuum()
+        return deleted
+
+    def start_maintenance(self, policy, interval=3600, initial_delay=60, extra_jobs=()):
+        """Run compact() periodically in a background thread"""
+        def maintain():
+            delay = initial_delay
+            while not self._maintenance_stop.wait(delay):
+                try:
+                    for job in extra_jobs:
+                        job()
+                    self.compact(policy)
+                except Exception as e:
+                    if not self._maintenance_stop.is_set():
+                        print(f"History maintenance error: {e}")
+                delay = interval
+
+        threading.Thread(target=maintain, name='history-maintenance', daemon=True).start()
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import time
+
+from .memory import DegradedTranslation
+from .pipeline import is_translation_error, segment_line
+
+
+def sentence_hash(sentence):
+    """Stable hash used to tell whether a sentence changed"""
+    return hashlib.sha1(sentence.encode('utf-8')).hexdigest()
+
+
+class IncrementalTranslator:
+    """Re-translates only the sentences that changed since the last call
+
+    The input is split into sentences, each one hashed, and only sentences
+    not seen in the previous translation are sent to the engine. Unchanged
+    sentences are stitched back from the previous result, so editing one
+    sentence of a long text costs one provider slot instead of the whole
+    document. Backends that cannot batch would need one request per changed
+    sentence, for them several changed sentences go as one whole-text request.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._languages = None
+        self._translations = {}
+        self.last_stats = {'sentences': 0, 'translated': 0}
+
+    def translate(self, text, source_lang, target_lang):
+        """Translate text, reusing translations of unchanged sentences"""
+        pieces = []
+        for line in text.splitlines(keepends=True):
+            pieces.extend(segment_line(line))
+
+        with self._lock:
+            if self._languages != (source_lang, target_lang):
+                self._languages = (source_lang, target_lang)
+                self._translations = {}
+            previous = self._translations
+
+        sentences = {sentence_hash(piece): piece for piece, translatable in pieces if translatable}
+        changed = [sentence for key, sentence in sentences.items() if key not in previous]
+
+        if self._whole_text_cheaper(len(changed)):
+            translated = self.engine.translate_text(text, source_lang, target_lang)
+            with self._lock:
+                # Nothing to reuse sentence by sentence, the engine cache has the whole text
+                if self._languages == (source_lang, target_lang):
+                    self._translations = {}
+                self.last_stats = {'sentences': len(sentences), 'translated': len(sentences)}
+            return translated
+
+        results = self.engine.translate_batch(changed, source_lang, target_lang) if changed else []
+        for result in results:
+            if is_translation_error(result):
+                return result
+
+        current = {key: previous[key] for key in sentences if key in previous}
+        for sentence, result in zip(changed, results):
+            current[sentence_hash(sentence)] = result
+
+        degraded = [result for result in results if isinstance(result, DegradedTranslation)]
+        with self._lock:
+            # Only keep sentences of the latest text, older ones live in the engine cache
+            if self._languages == (source_lang, target_lang):
+                # Stand-ins from memory are asked for again once the provider is back
+                self._translations = {key: result for key, result in current.items()
+                                      if not isinstance(result, DegradedTranslation)}
+            self.last_stats = {'sentences': len(sentences), 'translated': len(changed)}
+
+        translated = ''.join(current[sentence_hash(piece)] if translatable else piece
+                             for piece, translatable in pieces)
+        if degraded:
+            return DegradedTranslation(translated, min(result.score for result in degraded))
+        return translated
+
+    def _whole_text_cheaper(self, changed):
+        if changed < 2:
+            return False
+        translator = self.engine.translator
+        return translator is None or translator.capabilities().get('max_batch_items', 1) < 2
+
+    def reset(self):
+        """Forget previous translations"""
+        with self._lock:
+            self._languages = None
+            self._translations = {}
+
+
+class AdaptiveDebounce:
+    """Debounce interval that follows typing speed and provider latency
+
+    Fast typists get a short pause after their usual gap between keys, slow
+    typists a longer one. When the provider is slow there is little point
+    in firing requests that will be superseded, so the interval grows with
+    the observed latency. Times are in milliseconds.
+    """
+
+    def __init__(self, initial=500, minimum=150, maximum=1500, smoothing=0.3):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.smoothing = smoothing
+        self.typing_gap = initial / 1.5
+        self.provider_latency = 0.0
+        self._last_keystroke = None
+
+    def record_keystroke(self, now=None):
+        """Record a keystroke to learn the typing rhythm"""
+        now = time.monotonic() if now is None else now
+        if self._last_keystroke is not None:
+            gap = (now - self._last_keystroke) * 1000
+            # Pauses longer than a couple of seconds are breaks, not rhythm
+            if gap < 2000:
+                self.typing_gap += self.smoothing * (gap - self.typing_gap)
+        self._last_keystroke = now
+
+    def record_latency(self, seconds):
+        """Record how long a provider round trip took"""
+        latency = seconds * 1000
+        self.provider_latency += self.smoothing * (latency - self.provider_latency)
+
+    def interval(self):
+        """Current debounce interval in milliseconds"""
+        delay = self.typing_gap * 1.5 + self.provider_latency * 0.5
+        return int(min(self.maximum, max(self.minimum, delay)))
@@ -0,0 +1,227 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from .cache import make_cache_key, normalize_text
+
+DIGITS_PATTERN = re.compile(r'\d+')
+# Same words in different case ("Polish" vs "polish") are close but never exact
+CASE_ONLY_SCORE = 0.99
+
+
+def edit_distance(a, b, max_distance=None):
+    """Levenshtein distance, giving up once it exceeds max_distance"""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def similarity(a, b, min_score=0.0):
+    """Edit-distance similarity between 0 and 1"""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    max_distance = int(longest * (1 - min_score))
+    distance = edit_distance(a, b, max_distance)
+    return max(0.0, 1 - distance / longest)
+
+
+class DegradedTranslation(str):
+    """A past translation of similar text, served while the provider is unavailable
+
+    Behaves like the translated string; score and source_text tell callers
+    it is not a translation of their text so they can label it and keep it
+    out of caches and history.
+    """
+
+    def __new__(cls, text, score, source_text=None):
+        value = super().__new__(cls, text)
+        value.score = score
+        value.source_text = source_text
+        return value
+
+
+class TranslationMemory:
+    """Exact and fuzzy lookup of past translations served from history
+
+    Fuzzy candidates come from a MinHash LSH index over character trigrams
+    (one-permutation hashing, banded), then are scored by edit distance.
+    Matching ignores case, but only a case-sensitive match scores 1.0.
+    The newest max_entries history rows are indexed and new translations
+    are added as they are saved.
+    """
+
+    def __init__(self, history, max_entries=100_000, min_score=0.75, bins=32, rows_per_band=4,
+                 max_candidates=50):
+        self.history = history
+        self.max_entries = max_entries
+        self.min_score = min_score
+        self.bins = bins
+        self.rows_per_band = rows_per_band
+        self.max_candidates = max_candidates
+        self._entries = OrderedDict()
+        self._exact = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.stats = {'lookups': 0, 'exact_hits': 0, 'fuzzy_hits': 0}
+
+    def load(self, background=True):
+        """Index the newest history rows, optionally in a background thread"""
+        if background:
+            threading.Thread(target=self._load, name='translation-memory', daemon=True).start()
+        else:
+            self._load()
+
+    def _load(self):
+        try:
+            with self.history.read_lock:
+                rows = self.history.read_conn.execute('''
+                    SELECT source_text, translated_text, source_lang, target_lang, hit_count
+                    FROM translations
+                    WHERE source_text IS NOT NULL AND translated_text IS NOT NULL
+                    ORDER BY last_seen DESC LIMIT ?
+                ''', (self.max_entries,)).fetchall()
+        except Exception as e:
+            print(f"Translation memory load error: {e}")
+            return
+
+        # Oldest first so the newest entries end up last in eviction order
+        for row in reversed(rows):
+            # Translations saved while loading are newer than these rows
+            self.add(row[0], row[1], row[2], row[3], row[4], replace=False)
+        self.loaded = True
+
+    def add(self, source, translated, source_lang, target_lang, hit_count=1, replace=True):
+        """Add or refresh one translation, keeping an existing entry unless replace"""
+        exact = normalize_text(source)
+        normalized = exact.lower()
+        if not normalized:
+            return
+        key = make_cache_key(exact, source_lang, target_lang)
+        band_keys = [(target_lang,) + band for band in self._bands(normalized)]
+
+        with self._lock:
+            if key in self._entries:
+                if not replace:
+                    return
+                self._remove(key)
+            self._entries[key] = {
+                'source_text': source,
+                'translated_text': translated,
+                'source_lang': source_lang,
+                'target_lang': target_lang,
+                'hit_count': hit_count,
+                'exact': exact,
+                'normalized': normalized,
+                'band_keys': band_keys,
+            }
+            self._exact.setdefault((normalized, target_lang), []).append(key)
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def lookup(self, text, source_lang, target_lang, limit=3, min_score=None):
+        """Return up to limit matches for text, best first, each with a 'score'"""
+        min_score = self.min_score if min_score is None else min_score
+        exact_text = normalize_text(text)
+        normalized = exact_text.lower()
+        if not normalized:
+            return []
+        self.stats['lookups'] += 1
+
+        with self._lock:
+            exact = [self._entries[key] for key in self._exact.get((normalized, target_lang), [])]
+            candidates = Counter()
+            for band in self._bands(normalized):
+                candidates.update(self._buckets.get((target_lang,) + band, ()))
+            # Entries sharing more bands are more similar, only those get the costly edit distance
+            entries = [self._entries[key] for key, _ in candidates.most_common(self.max_candidates)]
+
+        matches = []
+        seen = set()
+        for entry in exact + entries:
+            if source_lang not in (None, 'auto') and entry['source_lang'] not in (source_lang, 'auto'):
+                continue
+            if id(entry) in seen:
+                continue
+            seen.add(id(entry))
+            score = similarity(normalized, entry['normalized'], min_score)
+            if score == 1.0 and entry['exact'] != exact_text:
+                score = CASE_ONLY_SCORE
+            if score >= min_score:
+                match = {name: value for name, value in entry.items()
+                         if name not in ('exact', 'normalized', 'band_keys')}
+                match['score'] = score
+                matches.append(match)
+
+        matches.sort(key=lambda match: (match['score'], match['hit_count']), reverse=True)
+        if matches:
+            self.stats['exact_hits' if matches[0]['score'] == 1.0 else 'fuzzy_hits'] += 1
+        return matches[:limit]
+
+    def best_servable(self, text, source_lang, target_lang, threshold):
+        """Return a translation safe to serve without the provider, or None
+
+        A match must reach the threshold and contain the same numbers as the
+        input, so "order 123" is never answered with the translation of
+        "order 124".
+        """
+        matches = self.lookup(text, source_lang, target_lang, limit=1, min_score=threshold)
+        if not matches:
+            return None
+        match = matches[0]
+        if DIGITS_PATTERN.findall(text) != DIGITS_PATTERN.findall(match['source_text']):
+            return None
+        return match
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        # Caller holds the lock
+        entry = self._entries.pop(key)
+        exact_keys = self._exact.get((entry['normalized'], entry['target_lang']))
+        if exact_keys:
+            exact_keys.remove(key)
+            if not exact_keys:
+                del self._exact[(entry['normalized'], entry['target_lang'])]
+        for band_key in entry['band_keys']:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _bands(self, normalized):
+        """MinHash signature split into LSH bands"""
+        padded = f"  {normalized} "
+        signature = [None] * self.bins
+        for index in range(len(padded) - 2):
+            value = hash(padded[index:index + 3]) & 0xFFFFFFFFFFFF
+            slot, rank = value % self.bins, value // self.bins
+            if signature[slot] is None or rank < signature[slot]:
+                signature[slot] = rank
+
+        bands = []
+        for start in range(0, self.bins, self.rows_per_band):
+            band = tuple(signature[start:start + self.rows_per_band])
+            # Bands made only of empty bins say nothing about similarity
+            if any(value is not None for value in band):
+                bands.append((start, band))
+        return bands
@@ -0,0 +1,149 @@
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .memory import DegradedTranslation
+
+# A sentence is a run of text followed by its closing punctuation
+SENTENCE_PATTERN = re.compile(r'[^.!?。！？]*[.!?。！？]+|[^.!?。！？]+')
+
+
+def has_letters(text):
+    """Check whether text contains anything worth translating"""
+    return any(ch.isalpha() for ch in text)
+
+
+def segment_line(line):
+    """Split a line into (piece, translatable) pairs that join back to the line"""
+    pieces = []
+    for match in SENTENCE_PATTERN.finditer(line):
+        chunk = match.group()
+        stripped = chunk.strip()
+        lead = chunk[:len(chunk) - len(chunk.lstrip())]
+        trail = chunk[len(chunk.rstrip()):] if stripped else ''
+
+        if lead:
+            pieces.append((lead, False))
+        if stripped:
+            # Numbers, timestamps and punctuation pass through untouched
+            pieces.append((stripped, has_letters(stripped)))
+        if trail:
+            pieces.append((trail, False))
+    return pieces
+
+
+def is_translation_error(result):
+    """Check whether the engine returned an error message instead of a translation"""
+    return result.startswith("Translation error") or result == "Translation service not available"
+
+
+def read_chunks(stream, max_chars=65536):
+    """Yield lines from a text stream, splitting overly long lines"""
+    while True:
+        chunk = stream.readline(max_chars)
+        if not chunk:
+            return
+        yield chunk
+
+
+class TranslationPipeline:
+    """Streaming read -> segment -> dedupe -> batch translate -> reassemble pipeline
+
+    Only `concurrency` windows of at most `batch_size` segments are held in
+    memory at once, so arbitrarily large inputs stream through in constant
+    memory. Windows are also capped at `max_window_chunks` chunks and
+    `max_window_chars` characters, so input with little to translate (subtitle
+    numbers, timestamps) does not pile up. Output is produced in input order.
+    """
+
+    def __init__(self, engine, source_lang, target_lang, batch_size=50, concurrency=4,
+                 max_line_chars=65536, save_history=False, max_window_chunks=1000,
+                 max_window_chars=1_000_000):
+        self.engine = engine
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.max_line_chars = max_line_chars
+        self.max_window_chunks = max_window_chunks
+        self.max_window_chars = max_window_chars
+        self.save_history = save_history
+        self.stats = {'chunks': 0, 'segments': 0, 'unique_segments': 0, 'windows': 0, 'degraded': 0,
+                      'errors': 0}
+        self.last_error = None
+        # Windows are translated on several threads
+        self._stats_lock = threading.Lock()
+
+    def run(self, chunks):
+        """Translate an iterable of text chunks, yielding translated chunks in order"""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = deque()
+            for window, unique in self.iter_windows(chunks):
+                in_flight.append(executor.submit(self.translate_window, window, unique))
+                # Backpressure: stop reading until the oldest window is done
+                if len(in_flight) >= self.concurrency:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+
+    def translate_stream(self, infile, outfile):
+        """Translate a text stream into another, returning pipeline statistics"""
+        for translated in self.run(read_chunks(infile, self.max_line_chars)):
+            outfile.write(translated)
+        outfile.flush()
+        return dict(self.stats)
+
+    def iter_windows(self, chunks):
+        """Group segmented chunks into windows of about batch_size segments"""
+        window, unique, segment_count, char_count = [], {}, 0, 0
+        for chunk in chunks:
+            pieces = segment_line(chunk)
+            window.append(pieces)
+            char_count += len(chunk)
+            self.stats['chunks'] += 1
+            for piece, translatable in pieces:
+                if translatable:
+                    # Dedupe within the window, repeats cost one provider slot
+                    unique[piece] = None
+                    segment_count += 1
+
+            if (segment_count >= self.batch_size or len(window) >= self.max_window_chunks or
+                    char_count >= self.max_window_chars):
+                yield self._close_window(window, unique, segment_count)
+                window, unique, segment_count, char_count = [], {}, 0, 0
+        if window:
+            yield self._close_window(window, unique, segment_count)
+
+    def _close_window(self, window, unique, segment_count):
+        self.stats['windows'] += 1
+        self.stats['segments'] += segment_count
+        self.stats['unique_segments'] += len(unique)
+        return window, list(unique)
+
+    def translate_window(self, window, unique):
+        """Translate one window's unique segments and reassemble its chunks"""
+        # 'auto' goes to the provider as is, a window may mix languages
+        translations = dict(zip(unique, self.engine.translate_batch(unique, self.source_lang,
+                                                                    self.target_lang)))
+        # Failed segments keep their source text, an error message is never written as a translation
+        errors = [source for source, translated in translations.items() if is_translation_error(translated)]
+        for source in errors:
+            self.last_error = translations[source]
+            translations[source] = source
+        # Similar past translations stood in for the provider, count them so they are not missed
+        degraded = sum(isinstance(translated, DegradedTranslation) for translated in translations.values())
+        if degraded or errors:
+            with self._stats_lock:
+                self.stats['degraded'] += degraded
+                self.stats['errors'] += len(errors)
+        if self.save_history:
+            failed = set(errors)
+            for source, translated in translations.items():
+                if source in failed or isinstance(translated, DegradedTranslation):
+                    continue
+                self.engine.save_translation(source, translated, self.source_lang, self.target_lang)
+
+        return [''.join(translations[piece] if translatable else piece
+                        for piece, translatable in pieces)
+                for pieces in window]
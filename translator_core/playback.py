@@ -0,0 +1,345 @@
+import io
+import threading
+import time
+from collections import deque
+
+
+class PygamePlayer:
+    """pygame.mixer.music driven by its end-of-track event instead of get_busy() polling
+
+    The mixer has one playing and one queued slot. pygame posts END_EVENT
+    whenever a track finishes, which needs the SDL event system, so the
+    display module is initialized without opening a window. Where that is
+    impossible the player falls back to checking get_busy().
+    """
+
+    def __init__(self, audio_format='mp3'):
+        import pygame
+
+        self.pygame = pygame
+        self.music = pygame.mixer.music
+        self.audio_format = audio_format
+        self.end_event = pygame.USEREVENT + 1
+        self.wake_event = pygame.USEREVENT + 2
+        # pygame reads clips lazily, buffers must outlive playback
+        self._buffers = deque(maxlen=2)
+        self._woken = threading.Event()
+        try:
+            pygame.display.init()
+            # Only our two events are queued, the widget does not use pygame events
+            pygame.event.set_blocked(None)
+            pygame.event.set_allowed([self.end_event, self.wake_event])
+            self.music.set_endevent(self.end_event)
+            self.events = True
+        except Exception as e:
+            print(f"Audio end events not available, polling instead: {e}")
+            self.events = False
+
+    def play(self, audio):
+        """Start playing audio now, replacing whatever plays"""
+        buffer = io.BytesIO(audio)
+        self.music.load(buffer, self.audio_format)
+        self.music.play()
+        self._buffers.append(buffer)
+
+    def queue(self, audio):
+        """Play audio right after the current track, without a gap"""
+        if not self.music.get_busy():
+            self.play(audio)
+            return
+        buffer = io.BytesIO(audio)
+        self.music.queue(buffer, self.audio_format)
+        self._buffers.append(buffer)
+
+    def stop(self):
+        """Stop playback and forget the queued track"""
+        self.music.stop()
+        self.music.unload()
+        if self.events:
+            self.pygame.event.clear(self.end_event)
+
+    def wait_end(self):
+        """Block until the playing track ends (True) or wake() is called (False)"""
+        if not self.events:
+            while self.music.get_busy():
+                if self._woken.wait(0.05):
+                    self._woken.clear()
+                    return False
+            return True
+
+        event = self.pygame.event.wait()
+        return event.type == self.end_event
+
+    def wake(self):
+        """Interrupt wait_end from another thread"""
+        if self.events:
+            self.pygame.event.post(self.pygame.event.Event(self.wake_event))
+        else:
+            self._woken.set()
+
+    def close(self):
+        """Release the mixer"""
+        self.music.set_endevent()
+
+
+class FakePlayer:
+    """Player that 'plays' each clip for a fixed time, for running without audio hardware"""
+
+    def __init__(self, seconds_per_clip=0.05):
+        self.seconds_per_clip = seconds_per_clip
+        self.played = []
+        self._cond = threading.Condition()
+        self._ends_at = None
+        self._queued = None
+        self._woken = False
+
+    def play(self, audio):
+        with self._cond:
+            self.played.append(audio)
+            self._ends_at = time.monotonic() + self.seconds_per_clip
+            self._queued = None
+            self._cond.notify_all()
+
+    def queue(self, audio):
+        with self._cond:
+            if self._ends_at is not None:
+                self._queued = audio
+                return
+        self.play(audio)
+
+    def stop(self):
+        with self._cond:
+            self._ends_at = None
+            self._queued = None
+
+    def wait_end(self):
+        with self._cond:
+            while True:
+                if self._woken:
+                    self._woken = False
+                    return False
+                if self._ends_at is None:
+                    return True
+                remaining = self._ends_at - time.monotonic()
+                if remaining <= 0:
+                    # The queued clip starts the moment the current one ends
+                    if self._queued is not None:
+                        self.played.append(self._queued)
+                        self._queued = None
+                        self._ends_at = time.monotonic() + self.seconds_per_clip
+                    else:
+                        self._ends_at = None
+                    return True
+                self._cond.wait(remaining)
+
+    def wake(self):
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+
+    def close(self):
+        pass
+
+
+class Utterance:
+    """One piece of text being spoken, as a stream of encoded clips"""
+
+    def __init__(self, clips, on_start=None, on_done=None):
+        self.clips = iter(clips)
+        self.on_start = on_start
+        self.on_done = on_done
+        self.cancelled = False
+        self.started = False
+        self.finished = False
+        self._pushed_back = None
+
+    def next_clip(self):
+        """Return the next clip or None when the utterance is exhausted or cancelled"""
+        if self.cancelled:
+            return None
+        if self._pushed_back is not None:
+            clip, self._pushed_back = self._pushed_back, None
+            return clip
+        try:
+            return next(self.clips, None)
+        except Exception as e:
+            print(f"Audio stream error: {e}")
+            return None
+
+    def push_back(self, clip):
+        """Return a fetched but unplayed clip so it plays first next time"""
+        self._pushed_back = clip
+
+    def close(self):
+        """Close the clip stream, cancelling synthesis still in progress"""
+        close = getattr(self.clips, 'close', None)
+        if close:
+            close()
+
+
+class AudioController:
+    """The single owner of audio playback
+
+    Utterances are queued and played one after another by one controller
+    thread that sleeps until the player reports the end of a track. While
+    a clip plays, the next one is fetched (synthesized) and queued in the
+    player, so consecutive clips and utterances play back to back. stop()
+    and skip() interrupt immediately. Callbacks run on the controller
+    thread.
+    """
+
+    def __init__(self, player):
+        self.player = player
+        self._queue = deque()
+        self._current = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {'utterances': 0, 'clips': 0, 'skipped': 0, 'stopped': 0}
+        self._thread = threading.Thread(target=self._run, name='audio-controller', daemon=True)
+        self._thread.start()
+
+    def play(self, clips, on_start=None, on_done=None, replace=True):
+        """Speak a stream of clips, replacing what plays or queued after it
+
+        on_start() is called when the first clip starts, on_done(completed)
+        when the utterance has played to the end, failed or was stopped.
+        """
+        utterance = Utterance(clips, on_start, on_done)
+        with self._cond:
+            if replace:
+                self._cancel_all()
+            self._queue.append(utterance)
+            self._cond.notify_all()
+        if replace:
+            self.player.wake()
+        return utterance
+
+    def stop(self):
+        """Stop playback and drop everything queued"""
+        with self._cond:
+            self._cancel_all()
+            self.stats['stopped'] += 1
+        self.player.wake()
+
+    def skip(self):
+        """Skip the rest of the current utterance"""
+        with self._cond:
+            if self._current is None:
+                return
+            self._current.cancelled = True
+            self.stats['skipped'] += 1
+        self.player.wake()
+
+    @property
+    def busy(self):
+        """Whether anything is playing or queued"""
+        with self._cond:
+            return self._current is not None or any(not u.cancelled for u in self._queue)
+
+    def close(self):
+        """Stop playback and end the controller thread"""
+        with self._cond:
+            self._closed = True
+            self._cancel_all()
+            self._cond.notify_all()
+        self.player.wake()
+        self._thread.join(timeout=1)
+        self.player.close()
+
+    def _cancel_all(self):
+        # Caller holds the lock
+        if self._current is not None:
+            self._current.cancelled = True
+        for utterance in self._queue:
+            utterance.cancelled = True
+
+    def _next_utterance(self, block):
+        with self._cond:
+            while block and not self._queue and not self._closed:
+                self._cond.wait()
+            while self._queue:
+                utterance = self._queue.popleft()
+                if not utterance.cancelled:
+                    return utterance
+                self._finish(utterance, False)
+            return None
+
+    def _next_clip(self, utterance, block):
+        """Return (utterance, clip): the rest of utterance first, then queued utterances"""
+        if utterance is not None:
+            clip = utterance.next_clip()
+            if clip is not None:
+                return utterance, clip
+        while True:
+            following = self._next_utterance(block)
+            if following is None:
+                return None, None
+            clip = following.next_clip()
+            if clip is not None:
+                return following, clip
+            self._finish(following, False)
+
+    def _run(self):
+        while not self._closed:
+            playing, clip = self._next_clip(None, block=True)
+            if clip is None:
+                continue
+
+            self.player.play(clip)
+            while playing is not None:
+                self._start(playing)
+                # Pre-buffer: fetch the following clip while this one plays
+                following, next_clip = self._next_clip(playing, block=False)
+                if next_clip is not None:
+                    self.player.queue(next_clip)
+
+                ended = self.player.wait_end()
+                # Wake-ups with nothing cancelled are stale, keep waiting
+                while not ended and not self._interrupted(playing, following):
+                    ended = self.player.wait_end()
+                interrupted = not ended or self._interrupted(playing, following)
+
+                if following is not playing:
+                    self._finish(playing, not interrupted or not playing.cancelled)
+                if interrupted:
+                    self.player.stop()
+                    if following is playing:
+                        self._finish(playing, False)
+                    elif following is not None:
+                        # Fetched ahead but never heard, it starts over from that clip
+                        following.push_back(next_clip)
+                        with self._cond:
+                            self._queue.appendleft(following)
+                    break
+                playing = following
+
+    def _interrupted(self, playing, following):
+        return (self._closed or playing.cancelled
+                or (following is not None and following.cancelled))
+
+    def _start(self, utterance):
+        self.stats['clips'] += 1
+        with self._cond:
+            self._current = utterance
+        if not utterance.started:
+            utterance.started = True
+            self.stats['utterances'] += 1
+            self._callback(utterance.on_start)
+
+    def _finish(self, utterance, completed):
+        if utterance.finished:
+            return
+        utterance.finished = True
+        utterance.close()
+        with self._cond:
+            if self._current is utterance:
+                self._current = None
+        self._callback(utterance.on_done, completed)
+
+    def _callback(self, callback, *args):
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Audio callback error: {e}")
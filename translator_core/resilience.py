@@ -0,0 +1,356 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .backends import TranslationBackend
+
+
+class ResilienceError(Exception):
+    """A request was refused locally without reaching the provider"""
+
+
+class CircuitOpenError(ResilienceError):
+    """The provider failed repeatedly and is not called until the breaker resets"""
+
+
+class RateLimitedError(ResilienceError):
+    """No request token became available in time"""
+
+
+# Exception classes of httpx (used by googletrans and the http backend), matched by name
+# so resilience does not need the package
+TRANSPORT_ERROR_NAMES = {'TransportError', 'TimeoutException', 'NetworkError', 'ProtocolError'}
+
+
+def is_provider_failure(error):
+    """Whether error means the provider is unhealthy, not that the request was bad
+
+    Transport errors, timeouts, 5xx and 429 answers count against the
+    provider. Anything else (an unsupported language, a bug on our side)
+    says nothing about its health.
+    """
+    status = getattr(error, 'status', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, (OSError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSPORT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate * 2))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=0.0):
+        """Take a token, returning how long to wait before using it, or None if that exceeds max_wait
+
+        Tokens may be taken ahead of time, later callers then queue behind.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            delay = max(0.0, (1 - self._tokens) / self.rate)
+            if delay > max_wait:
+                return None
+            self._tokens -= 1
+            return delay
+
+    def acquire(self, max_wait=0.0):
+        """Block until a token is available, False if that would take longer than max_wait"""
+        delay = self.reserve(max_wait)
+        if delay is None:
+            return False
+        if delay:
+            time.sleep(delay)
+        return True
+
+
+class CircuitBreaker:
+    """Fails fast after `failure_threshold` consecutive failures
+
+    Once open, calls are refused for `reset_timeout` seconds, then a single
+    trial call is let through (half-open): success closes the breaker,
+    failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'rejected': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Whether a call may go to the provider now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_running = False
+            if self._state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def release_trial(self):
+        """Give back a half-open trial slot that was not used for a call"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats['opened'] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class BackendGuard:
+    """Rate limiter and circuit breaker in front of one backend"""
+
+    def __init__(self, name, rate_limit=None, burst=None, failure_threshold=5, reset_timeout=30.0,
+                 max_wait=1.0):
+        self.name = name
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_wait = max_wait
+        self.stats = {'calls': 0, 'failures': 0, 'client_errors': 0, 'rate_limited': 0, 'short_circuited': 0}
+
+    def admit(self):
+        """Return the seconds to wait before calling, or raise a ResilienceError"""
+        if not self.breaker.allow():
+            self.stats['short_circuited'] += 1
+            raise CircuitOpenError(f"{self.name} is failing, circuit open")
+        delay = 0.0
+        if self.bucket is not None:
+            delay = self.bucket.reserve(self.max_wait)
+            if delay is None:
+                self.breaker.release_trial()
+                self.stats['rate_limited'] += 1
+                raise RateLimitedError(f"{self.name} rate limit reached")
+        self.stats['calls'] += 1
+        return delay
+
+    def succeeded(self):
+        self.breaker.record_success()
+
+    def failed(self, error=None):
+        """Record a failed call, only provider failures count toward opening the breaker"""
+        self.stats['failures'] += 1
+        if error is None or is_provider_failure(error):
+            self.breaker.record_failure()
+        else:
+            self.stats['client_errors'] += 1
+            self.breaker.release_trial()
+
+    def snapshot(self):
+        return dict(self.stats, state=self.breaker.state, opened=self.breaker.stats['opened'])
+
+
+class ResilientBackend(TranslationBackend):
+    """Wraps a backend with rate limiting, a circuit breaker and an optional secondary
+
+    Requests the primary refuses (rate limit, open circuit) or fails go to
+    the secondary backend. With hedge_after set, a request the primary has
+    not answered within that many seconds is also sent to the secondary
+    and whichever answers first wins.
+    """
+
+    def __init__(self, primary, secondary=None, hedge_after=None, rate_limit=None,
+                 failure_threshold=5, reset_timeout=30.0, max_wait=1.0):
+        self.primary = primary
+        self.secondary = secondary
+        self.hedge_after = hedge_after
+        self.name = primary.name
+        self.max_batch_items = primary.max_batch_items
+        self.max_batch_chars = primary.max_batch_chars
+        if secondary is not None:
+            # Batches must fit either backend
+            self.max_batch_items = min(primary.max_batch_items, secondary.max_batch_items)
+            self.max_batch_chars = min(filter(None, (primary.max_batch_chars, secondary.max_batch_chars)),
+                                       default=None)
+
+        self.guards = {
+            'primary': BackendGuard(primary.name, rate_limit or getattr(primary, 'rate_limit', None),
+                                    failure_threshold=failure_threshold, reset_timeout=reset_timeout,
+                                    max_wait=max_wait),
+        }
+        if secondary is not None:
+            self.guards['secondary'] = BackendGuard(secondary.name, getattr(secondary, 'rate_limit', None),
+                                                    failure_threshold=failure_threshold,
+                                                    reset_timeout=reset_timeout, max_wait=max_wait)
+        self._executor = None
+        if secondary is not None and hedge_after is not None:
+            self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+        self.stats = {'failovers': 0, 'hedged': 0, 'hedge_wins': 0}
+
+    @property
+    def provider(self):
+        """The primary's async provider, if it has one"""
+        return getattr(self.primary, 'provider', None)
+
+    @property
+    def loop_thread(self):
+        return getattr(self.primary, 'loop_thread', None)
+
+    def translate(self, text, source_lang, target_lang):
+        return self._call('translate', text, source_lang, target_lang)
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        if not texts:
+            return []
+        return self._call('translate_batch', texts, source_lang, target_lang)
+
+    def detect(self, text):
+        return self._call('detect', text)
+
+    def capabilities(self):
+        capabilities = dict(self.primary.capabilities())
+        capabilities['max_batch_items'] = self.max_batch_items
+        capabilities['max_batch_chars'] = self.max_batch_chars
+        capabilities['secondary'] = self.secondary.name if self.secondary is not None else None
+        return capabilities
+
+    def backend_stats(self):
+        """Guard state and counters per backend, plus failover and hedging counts"""
+        stats = dict(self.stats)
+        for role, guard in self.guards.items():
+            stats[role] = guard.snapshot()
+        return stats
+
+    def _attempt(self, role, method, args):
+        backend = self.primary if role == 'primary' else self.secondary
+        guard = self.guards[role]
+        delay = guard.admit()
+        if delay:
+            time.sleep(delay)
+        try:
+            result = getattr(backend, method)(*args)
+        except Exception as e:
+            guard.failed(e)
+            raise
+        guard.succeeded()
+        return result
+
+    def _call(self, method, *args):
+        if self.secondary is None:
+            return self._attempt('primary', method, args)
+        if self._executor is None:
+            try:
+                return self._attempt('primary', method, args)
+            except Exception as e:
+                print(f"{self.primary.name} unavailable, using {self.secondary.name}: {e}")
+                self.stats['failovers'] += 1
+                return self._attempt('secondary', method, args)
+
+        primary = self._executor.submit(self._attempt, 'primary', method, args)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done and primary.exception() is None:
+            return primary.result()
+        if done:
+            self.stats['failovers'] += 1
+        else:
+            self.stats['hedged'] += 1
+
+        secondary = self._executor.submit(self._attempt, 'secondary', method, args)
+        pending = {primary, secondary}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is secondary and not primary.done():
+                        self.stats['hedge_wins'] += 1
+                    return future.result()
+        # Both failed, report the primary's error
+        raise primary.exception()
+
+    async def _attempt_async(self, role, method, args):
+        backend = self.primary if role == 'primary' else self.secondary
+        guard = self.guards[role]
+        delay = guard.admit()
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            provider = getattr(backend, 'provider', None)
+            if provider is not None:
+                result = await getattr(provider, method)(*args)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(None, getattr(backend, method), *args)
+        except asyncio.CancelledError:
+            # Lost a hedge race, says nothing about the backend's health
+            guard.breaker.release_trial()
+            raise
+        except Exception as e:
+            guard.failed(e)
+            raise
+        guard.succeeded()
+        return result
+
+    async def call_async(self, method, *args):
+        """Coroutine version of the guarded, hedged call for AsyncTranslatorEngine"""
+        primary = asyncio.ensure_future(self._attempt_async('primary', method, args))
+        if self.secondary is None:
+            return await primary
+
+        await asyncio.wait({primary}, timeout=self.hedge_after)
+        if primary.done() and primary.exception() is None:
+            return primary.result()
+        if primary.done():
+            self.stats['failovers'] += 1
+        else:
+            self.stats['hedged'] += 1
+
+        secondary = asyncio.ensure_future(self._attempt_async('secondary', method, args))
+        pending = {primary, secondary}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is secondary and not primary.done():
+                        self.stats['hedge_wins'] += 1
+                        primary.cancel()
+                    return task.result()
+        raise primary.exception()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        for backend in (self.primary, self.secondary):
+            close = getattr(backend, 'close', None)
+            if close:
+                close()
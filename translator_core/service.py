@@ -0,0 +1,321 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .memory import DegradedTranslation
+from .pipeline import is_translation_error
+
+AUDIO_TYPES = {'mp3': 'audio/mpeg', 'wav': 'audio/wav'}
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+class ServiceError(Exception):
+    """Request failed with an HTTP status to report to the client"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Coalescer:
+    """Runs identical concurrent calls once and hands every caller the same result"""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def run(self, key, fn, *args):
+        with self._lock:
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return pending.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+
+class ServiceMetrics:
+    """Request counts, errors and recent latencies per endpoint"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.started = time.time()
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            entry = self._endpoints.get(endpoint)
+            if entry is None:
+                entry = self._endpoints[endpoint] = {
+                    'requests': 0, 'errors': 0, 'latencies': deque(maxlen=self.window)}
+            entry['requests'] += 1
+            if not ok:
+                entry['errors'] += 1
+            entry['latencies'].append(seconds * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {}
+            for name, entry in self._endpoints.items():
+                latencies = sorted(entry['latencies'])
+                endpoints[name] = {
+                    'requests': entry['requests'],
+                    'errors': entry['errors'],
+                    'p50_ms': _percentile(latencies, 50),
+                    'p95_ms': _percentile(latencies, 95),
+                    'p99_ms': _percentile(latencies, 99),
+                }
+        return {'uptime_s': round(time.time() - self.started, 1), 'endpoints': endpoints}
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return round(values[index], 2)
+
+
+class TranslationService:
+    """Local HTTP/JSON API over one shared TranslatorEngine
+
+    POST /translate       {"text", "source": "auto", "target"} -> {"translation", "source", "target"}
+    POST /translate_batch {"texts", "source", "target"}        -> {"translations"}
+
+    While the provider is unavailable a similar past translation may be
+    returned instead, marked with "degraded" (and its "score") in /translate
+    and listed by index in /translate_batch's "degraded".
+    POST /detect          {"text"}                             -> {"language", "confidence"}
+    POST /tts             {"text", "language"}                 -> audio bytes
+    GET  /metrics, GET /health
+
+    Identical requests in flight at the same time share one engine call,
+    and every client shares the engine's translation and audio caches.
+    """
+
+    def __init__(self, engine, host='127.0.0.1', port=8765, save_history=False):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.save_history = save_history
+        self.inflight = Coalescer()
+        self.metrics = ServiceMetrics()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Serve in a background thread, returns once the port is bound"""
+        self._bind()
+        self._thread = threading.Thread(target=self._server.serve_forever, name='translation-service',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted"""
+        self._bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _bind(self):
+        handler = type('Handler', (ServiceHandler,), {'service': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+    def translate(self, request):
+        text = _require(request, 'text', str)
+        target = _require(request, 'target', str)
+        # 'auto' goes to the provider as is, like TranslatorEngine.translate_text
+        source = request.get('source') or 'auto'
+        translation = self.inflight.run(('translate', text, source, target),
+                                        self._translate_one, text, source, target)
+        response = {'translation': translation, 'source': source, 'target': target}
+        if isinstance(translation, DegradedTranslation):
+            response['degraded'] = True
+            response['score'] = translation.score
+        return response
+
+    def _translate_one(self, text, source, target):
+        translated = self.engine.translate_text(text, source, target)
+        if translated == "Translation service not available":
+            raise ServiceError(503, translated)
+        if translated.startswith("Translation error"):
+            raise ServiceError(502, translated)
+        if self.save_history and translated and not isinstance(translated, DegradedTranslation):
+            self.engine.save_translation(text, translated, source, target)
+        return translated
+
+    def translate_batch(self, request):
+        texts = _require(request, 'texts', list)
+        if not all(isinstance(text, str) for text in texts):
+            raise ServiceError(400, "'texts' must be a list of strings")
+        target = _require(request, 'target', str)
+        source = request.get('source') or 'auto'
+        translations = list(self.inflight.run(('translate_batch', tuple(texts), source, target),
+                                              self.engine.translate_batch, texts, source, target))
+        errors = [index for index, translated in enumerate(translations) if is_translation_error(translated)]
+        if errors and len(errors) == len(texts):
+            # Nothing usable came back, so fail the request like /translate does
+            failure = translations[errors[-1]]
+            raise ServiceError(503 if failure == "Translation service not available" else 502, failure)
+        for index in errors:
+            translations[index] = None
+        degraded = [index for index, translated in enumerate(translations)
+                    if isinstance(translated, DegradedTranslation)]
+        if self.save_history:
+            for index, (text, translated) in enumerate(zip(texts, translations)):
+                if translated and index not in degraded:
+                    self.engine.save_translation(text, translated, source, target)
+        return {'translations': translations, 'source': source, 'target': target,
+                'degraded': degraded, 'errors': errors}
+
+    def detect(self, request):
+        text = _require(request, 'text', str)
+        language, confidence = self.inflight.run(('detect', text), self.engine.detect_language_confidence, text)
+        return {'language': language, 'confidence': confidence}
+
+    def tts(self, request):
+        text = _require(request, 'text', str)
+        language = request.get('language') or 'en'
+        # The engine already shares one synthesis between concurrent identical requests
+        audio = self.engine.synthesize_audio(text, language)
+        if audio is None:
+            raise ServiceError(502, "Speech synthesis failed")
+        return audio
+
+    def stats(self):
+        stats = self.metrics.snapshot()
+        stats['coalesced'] = self.inflight.coalesced
+        stats['translation_cache'] = self.engine.get_cache_stats()
+        stats['audio_cache'] = self.engine.get_audio_cache_stats()
+        stats['speech'] = dict(self.engine.speech_stats)
+        stats['backend'] = self.engine.backend_stats()
+        return stats
+
+
+def _require(request, field, kind):
+    value = request.get(field)
+    if not isinstance(value, kind):
+        raise ServiceError(400, f"'{field}' is required ({kind.__name__})")
+    return value
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Routes requests to the TranslationService set on the subclass"""
+
+    service = None
+    protocol_version = 'HTTP/1.1'
+    POST_ROUTES = ('translate', 'translate_batch', 'detect', 'tts')
+
+    def do_GET(self):
+        path = self.path.split('?')[0].rstrip('/')
+        if path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif path == '/metrics':
+            self._send_json(200, self.service.stats())
+        else:
+            self._send_json(404, {'error': f"No route {path}"})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        endpoint = self.path.split('?')[0].strip('/')
+        ok = False
+        try:
+            if endpoint not in self.POST_ROUTES:
+                self._discard_body()
+                raise ServiceError(404, f"No route /{endpoint}")
+            result = getattr(self.service, endpoint)(self._read_json())
+            if isinstance(result, bytes):
+                self._send(200, result, AUDIO_TYPES.get(self.service.engine.synthesizer.format,
+                                                        'application/octet-stream'))
+            else:
+                self._send_json(200, result)
+            ok = True
+        except ServiceError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            print(f"Service error on /{endpoint}: {e}")
+            self._send_json(500, {'error': str(e)})
+        finally:
+            if endpoint in self.POST_ROUTES:
+                self.service.metrics.record(endpoint, time.perf_counter() - started, ok)
+
+    def _content_length(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Without a usable length the body can't be told apart from the next request
+            self.close_connection = True
+            raise ServiceError(400, "Invalid Content-Length")
+        return length
+
+    def _read_json(self):
+        length = self._content_length()
+        if length > MAX_BODY_BYTES:
+            # The unread body would be taken for the next request
+            self.close_connection = True
+            raise ServiceError(413, "Request body too large")
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise ServiceError(400, "Invalid JSON")
+        if not isinstance(request, dict):
+            raise ServiceError(400, "Expected a JSON object")
+        return request
+
+    def _discard_body(self):
+        # Left unread, the body would be taken for the next request on this connection
+        length = self._content_length()
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+        elif length:
+            self.rfile.read(length)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per request on stderr would drown out real errors
+        pass
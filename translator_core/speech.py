@@ -0,0 +1,146 @@
+import io
+import math
+import re
+import struct
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Sentence ends, then softer breaks for sentences too long to speak as one chunk
+SPEECH_SENTENCE_PATTERN = re.compile(r'[^.!?。！？\n]*[.!?。！？]+["\')\]]*|[^.!?。！？\n]+')
+SPEECH_BREAK_PATTERN = re.compile(r'[,;:，、；]\s*|\s+')
+
+
+def split_speech(text, max_chars=100):
+    """Split text into sentence chunks of at most max_chars for streaming synthesis"""
+    chunks = []
+    for match in SPEECH_SENTENCE_PATTERN.finditer(text):
+        sentence = match.group().strip()
+        while len(sentence) > max_chars:
+            # Cut at the last comma or space that fits, else hard at max_chars
+            cut = max_chars
+            for brk in SPEECH_BREAK_PATTERN.finditer(sentence, 0, max_chars):
+                if brk.end() > 0:
+                    cut = brk.end()
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return [chunk for chunk in chunks if any(ch.isalnum() for ch in chunk)]
+
+
+class Synthesizer:
+    """Base class for text-to-speech engines returning encoded audio bytes"""
+
+    name = 'base'
+    format = 'mp3'
+
+    @property
+    def voice(self):
+        """Identifies the voice in audio cache keys"""
+        return self.name
+
+    def synthesize(self, text, language):
+        """Return audio bytes for text spoken in language"""
+        raise NotImplementedError
+
+
+class GTTSSynthesizer(Synthesizer):
+    """Google Text-to-Speech via gTTS"""
+
+    name = 'gtts'
+    format = 'mp3'
+
+    def __init__(self, tld='com', slow=False):
+        self.tld = tld
+        self.slow = slow
+
+    @property
+    def voice(self):
+        return f"gtts-{self.tld}{'-slow' if self.slow else ''}"
+
+    def synthesize(self, text, language):
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=language, slow=self.slow, tld=self.tld).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class ToneSynthesizer(Synthesizer):
+    """Local stand-in that renders a short WAV tone per character
+
+    Needs no network or packages, so playback, caching and streaming can be
+    exercised offline. latency and seconds_per_char simulate a slow service.
+    """
+
+    name = 'tone'
+    format = 'wav'
+
+    def __init__(self, latency=0.0, seconds_per_char=0.0, ms_per_char=40, sample_rate=16000):
+        self.latency = latency
+        self.seconds_per_char = seconds_per_char
+        self.ms_per_char = ms_per_char
+        self.sample_rate = sample_rate
+
+    def synthesize(self, text, language):
+        delay = self.latency + self.seconds_per_char * len(text)
+        if delay:
+            time.sleep(delay)
+
+        frames = int(self.sample_rate * self.ms_per_char / 1000 * max(len(text), 1))
+        # Pitch depends on the language so clips are told apart by ear
+        frequency = 220 + sum(map(ord, language)) % 440
+        samples = struct.pack(f'<{frames}h', *(
+            int(8000 * math.sin(2 * math.pi * frequency * i / self.sample_rate)) for i in range(frames)))
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(samples)
+        return buffer.getvalue()
+
+
+SYNTHESIZERS = {
+    'gtts': GTTSSynthesizer,
+    'tone': ToneSynthesizer,
+}
+
+
+def create_synthesizer(name, **options):
+    """Instantiate a registered synthesizer by name"""
+    try:
+        synthesizer_class = SYNTHESIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown TTS synthesizer '{name}', expected one of: {', '.join(SYNTHESIZERS)}")
+    return synthesizer_class(**options)
+
+
+def stream_chunks(synthesize, chunks, lookahead=2):
+    """Yield synthesize(chunk) for each chunk in order, working up to lookahead chunks ahead
+
+    The first result is available as soon as the first chunk is done, and
+    later chunks are synthesized while earlier ones play. Closing the
+    generator cancels chunks not yet started.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(lookahead, 1), thread_name_prefix='tts-stream')
+    pending = deque()
+    chunks = iter(chunks)
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(synthesize, chunk))
+            if len(pending) >= lookahead:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for chunk in chunks:
+                pending.append(executor.submit(synthesize, chunk))
+                break
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import random
+import threading
+
+from .backends import OfflineBackend
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           503: 'Service Unavailable'}
+
+
+class StandInServer:
+    """Local LibreTranslate-compatible HTTP server backed by the offline engine
+
+    For tests and benchmarks of the http backend without a network. Runs
+    its own event loop in a daemon thread and keeps connections alive.
+    latency delays every response and failure_rate answers that share
+    of requests with 503 to exercise retries.
+
+        with StandInServer(latency=0.05) as server:
+            engine = TranslatorEngine(backend='http', backend_options={'base_url': server.url})
+    """
+
+    def __init__(self, backend=None, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, seed=None):
+        self.backend = backend or OfflineBackend()
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self.stats = {'requests': 0, 'connections': 0, 'failures': 0, 'in_flight': 0, 'peak_in_flight': 0}
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving in the background and return once the port is bound"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='standin-server', daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            # Kept-alive connections would otherwise keep their handlers waiting
+            handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=1)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=1)
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def _handle(self, reader, writer):
+        self.stats['connections'] += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path = request_line.decode('latin-1').split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self._respond(method, path, body)
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                close = headers.get('connection', '').lower() == 'close'
+                writer.write((f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                              f"Content-Type: application/json\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n").encode('latin-1') + data)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, path, body):
+        self.stats['requests'] += 1
+        self.stats['in_flight'] += 1
+        self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.stats['in_flight'])
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                self.stats['failures'] += 1
+                return 503, {'error': 'Simulated outage'}
+            if method != 'POST':
+                return 405, {'error': 'Use POST'}
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError:
+                return 400, {'error': 'Invalid JSON'}
+
+            path = path.split('?')[0]
+            if path == '/translate':
+                texts = request.get('q')
+                source, target = request.get('source', 'auto'), request.get('target', 'en')
+                if isinstance(texts, list):
+                    return 200, {'translatedText': self.backend.translate_batch(texts, source, target)}
+                return 200, {'translatedText': self.backend.translate(texts or '', source, target)}
+            if path == '/detect':
+                return 200, [{'language': self.backend.detect(request.get('q', '')), 'confidence': 90.0}]
+            return 404, {'error': f'No route {path}'}
+        finally:
+            self.stats['in_flight'] -= 1
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Local stand-in translation server")
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--offline-dictionary', help="JSON phrase table for the offline engine")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds to delay each response")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args(argv)
+
+    backend = OfflineBackend(dictionary_path=args.offline_dictionary)
+    server = StandInServer(backend, port=args.port, latency=args.latency, failure_rate=args.failure_rate)
+    server.start()
+    print(f"Serving on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
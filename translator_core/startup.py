@@ -0,0 +1,60 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Records when each startup phase ran and how long it took
+
+    started is a time.perf_counter() value taken as early as possible, so
+    the report also covers interpreter and import time before the timer
+    was created.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one phase"""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, begin, time.perf_counter() - begin)
+
+    def mark(self, name):
+        """Record a point in time, such as the window becoming visible"""
+        self._record(name, time.perf_counter(), None)
+
+    def _record(self, name, begin, duration):
+        with self._lock:
+            self.phases.append({
+                'name': name,
+                'at_ms': (begin - self.started) * 1000,
+                'duration_ms': None if duration is None else duration * 1000,
+                'thread': threading.current_thread().name,
+            })
+
+    def elapsed_ms(self, name):
+        """Milliseconds from start until the named phase ended or mark was set, or None"""
+        with self._lock:
+            for entry in self.phases:
+                if entry['name'] == name:
+                    return entry['at_ms'] + (entry['duration_ms'] or 0)
+        return None
+
+    def report(self):
+        """Human-readable table of phases in the order they started"""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda entry: entry['at_ms'])
+        lines = ["Startup timing:"]
+        for entry in phases:
+            if entry['duration_ms'] is None:
+                lines.append(f"  {entry['name']:<24} {'':>9}    at {entry['at_ms']:8.1f} ms")
+            else:
+                lines.append(f"  {entry['name']:<24} {entry['duration_ms']:7.1f} ms at {entry['at_ms']:8.1f} ms"
+                             f"  [{entry['thread']}]")
+        return '\n'.join(lines)
@@ -0,0 +1,206 @@
+import threading
+from collections import deque
+
+
+class Job:
+    """A unit of work queued on a WorkerPool"""
+
+    def __init__(self, fn, args, kwargs, key=None, provider=None, callback=None, error_callback=None):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.provider = provider
+        self.callback = callback
+        self.error_callback = error_callback
+        self.cancelled = False
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def cancel(self):
+        """Mark the job cancelled, its result will be discarded"""
+        self.cancelled = True
+
+    def wait(self, timeout=None):
+        """Wait for the job to finish and return its result"""
+        self.done.wait(timeout)
+        return self.result
+
+
+class RequestSequencer:
+    """Hands out monotonic request IDs per field so stale results can be dropped"""
+
+    def __init__(self):
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def next(self, field):
+        """Start a new request for field and return its ID"""
+        with self._lock:
+            request_id = self._latest.get(field, 0) + 1
+            self._latest[field] = request_id
+            return request_id
+
+    def invalidate(self, field):
+        """Make every request issued so far for field stale"""
+        self.next(field)
+
+    def is_current(self, field, request_id):
+        """Check whether request_id is the newest request for field"""
+        with self._lock:
+            return self._latest.get(field, 0) == request_id
+
+
+class WorkerPool:
+    """Bounded executor with a request queue, per-provider limits and superseding
+
+    Jobs submitted with a key cancel any earlier job with the same key, so a
+    burst of keystrokes or clipboard changes costs at most one running and
+    one queued provider call. Providers listed in provider_limits never get
+    more than that many jobs running at once. When the queue is full new
+    jobs are rejected (or the caller blocks) instead of piling up threads.
+    """
+
+    def __init__(self, max_workers=4, max_queue=32, provider_limits=None, name='worker'):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.provider_limits = dict(provider_limits or {})
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._latest = {}
+        self._running = {}
+        self._shutdown = False
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0,
+                      'superseded': 0, 'cancelled': 0, 'rejected': 0}
+
+        self._threads = []
+        for index in range(max_workers):
+            thread = threading.Thread(target=self._worker, name=f"{name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn, *args, key=None, provider=None, callback=None, error_callback=None,
+               block=False, **kwargs):
+        """Queue fn(*args, **kwargs), returning the Job or None if rejected"""
+        job = Job(fn, args, kwargs, key=key, provider=provider,
+                  callback=callback, error_callback=error_callback)
+
+        with self._cond:
+            # Check capacity before touching the previous job, a rejected
+            # submit must leave the job it would have superseded in place
+            while True:
+                if self._shutdown:
+                    return None
+                previous = self._latest.get(key) if key is not None else None
+                # Superseding a job that is still queued frees its slot
+                replaces = previous is not None and not previous.cancelled and previous in self._queue
+                if len(self._queue) - replaces < self.max_queue:
+                    break
+                if not block:
+                    self.stats['rejected'] += 1
+                    return None
+                self._cond.wait()
+
+            if key is not None:
+                if previous is not None and not previous.done.is_set():
+                    previous.cancel()
+                    self.stats['superseded'] += 1
+                self._latest[key] = job
+                self._discard_cancelled()
+
+            self._queue.append(job)
+            self.stats['submitted'] += 1
+            self._cond.notify_all()
+        return job
+
+    def cancel(self, key):
+        """Cancel the latest job submitted with key"""
+        with self._cond:
+            job = self._latest.get(key)
+            if job is not None and not job.done.is_set():
+                job.cancel()
+                self.stats['cancelled'] += 1
+            self._discard_cancelled()
+
+    def is_current(self, job):
+        """Check whether job is still the latest for its key"""
+        return not job.cancelled and (job.key is None or self._latest.get(job.key) is job)
+
+    def queued(self):
+        """Number of jobs waiting for a worker"""
+        with self._cond:
+            return len(self._queue)
+
+    def shutdown(self, wait=False):
+        """Stop accepting work and cancel everything still queued"""
+        with self._cond:
+            self._shutdown = True
+            for job in self._queue:
+                job.cancel()
+                job.done.set()
+            self._queue.clear()
+            self._cond.notify_all()
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _discard_cancelled(self):
+        # Caller holds the condition lock
+        kept = deque(job for job in self._queue if not job.cancelled)
+        for job in self._queue:
+            if job.cancelled:
+                job.done.set()
+        self._queue = kept
+        self._cond.notify_all()
+
+    def _next_job(self):
+        # Caller holds the condition lock
+        for job in self._queue:
+            limit = self.provider_limits.get(job.provider)
+            if limit is None or self._running.get(job.provider, 0) < limit:
+                self._queue.remove(job)
+                return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None and not self._shutdown:
+                    self._cond.wait()
+                    job = self._next_job()
+                if job is None:
+                    return
+                self._running[job.provider] = self._running.get(job.provider, 0) + 1
+                self._cond.notify_all()
+
+            ran = not job.cancelled
+            try:
+                if ran:
+                    job.result = job.fn(*job.args, **job.kwargs)
+            except Exception as e:
+                job.error = e
+            finally:
+                with self._cond:
+                    self._running[job.provider] -= 1
+                    if job.error is not None:
+                        self.stats['failed'] += 1
+                    elif ran:
+                        self.stats['completed'] += 1
+                    self._cond.notify_all()
+
+            # Results of superseded jobs are dropped instead of reaching the UI
+            if not job.cancelled:
+                try:
+                    if job.error is not None:
+                        if job.error_callback:
+                            job.error_callback(job.error)
+                        else:
+                            print(f"Background task error: {job.error}")
+                    elif job.callback:
+                        job.callback(job.result)
+                except Exception as e:
+                    print(f"Background callback error: {e}")
+            job.done.set()